@@ -5,4 +5,4 @@ from __future__ import print_function
 __author__ = "bibow"
 
 __all__ = ["neo4j_graph_connector"]
-from .neo4j_graph_connector import Neo4jConnector
+from .neo4j_graph_connector import AsyncNeo4jConnector, Neo4jConnector, Neo4jSettings
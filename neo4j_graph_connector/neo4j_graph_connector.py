@@ -4,111 +4,2915 @@ from __future__ import print_function
 
 __author__ = "bibow"
 
+import asyncio
+import base64
+import contextlib
+import contextvars
+import copy
 import datetime
+import functools
+import hashlib
+import json
 import logging
+import os
+import re
+import threading
+import time
 import traceback
-from typing import Any, Dict, List, Optional, Tuple
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import MISSING, dataclass, fields
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
 
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, GraphDatabase
+from neo4j.graph import Node, Path, Relationship
+from neo4j.spatial import Point
+from neo4j.time import Date, DateTime, Duration, Time
 
+try:
+    import numpy as np
+except ImportError:  # Optional: pip install Neo4j-Graph-Connector[numpy]
+    np = None
 
-class Neo4jConnector(object):
-    def __init__(self, logger: logging.Logger, **setting: Dict[str, Any]) -> None:
+try:
+    import pyarrow as pa
+except ImportError:  # Optional: pip install Neo4j-Graph-Connector[arrow]
+    pa = None
+
+# A node pattern without a label, e.g. "()", "(n)" or "(n {id: 1})"; function calls are skipped.
+_UNLABELED_NODE_PATTERN = re.compile(r"(?<![\w.`])\(\s*\w*\s*(?:\{|\))")
+
+
+# Temporal ordering keys are carried through the cursor token as tagged ISO strings.
+_CURSOR_TEMPORAL_TYPES = {
+    "date": Date,
+    "datetime": DateTime,
+    "time": Time,
+    "duration": Duration,
+}
+
+
+def _cursor_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if type(value) in (list, tuple):  # not Duration or Point
+        return [_cursor_value(item) for item in value]
+    for tag, temporal_type in _CURSOR_TEMPORAL_TYPES.items():
+        if type(value) is temporal_type:
+            return {tag: value.iso_format()}
+    raise ValueError(
+        "cursor_key must evaluate to a string, number, boolean, temporal value or a list "
+        f"of those, got {type(value).__name__}."
+    )
+
+
+def _driver_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_driver_value(item) for item in value]
+    if isinstance(value, dict):
+        ((tag, text),) = value.items()
+        return _CURSOR_TEMPORAL_TYPES[tag].from_iso_format(text)
+    return value
+
+
+def _encode_cursor(value: Any) -> str:
+    """Wrap the last ordering-key value of a page (a raw driver value) into an opaque token."""
+    return base64.urlsafe_b64encode(
+        json.dumps(_cursor_value(value)).encode("utf-8")
+    ).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Any:
+    return _driver_value(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii"))))
+
+
+def _query_cache_key(
+    cypher_query: str, parameters: Optional[Dict[str, Any]] = None
+) -> Tuple[str, str]:
+    """Build a cache key from the whitespace-normalized query text and its parameters."""
+    return (
+        " ".join(cypher_query.split()),
+        json.dumps(parameters or {}, sort_keys=True, default=str),
+    )
+
+
+_IS_PREDICATE_WORDS = frozenset(
+    ("NULL", "NOT", "TYPED", "NORMALIZED", "NFC", "NFD", "NFKC", "NFKD")
+)
+
+
+def _query_tags(cypher_query: str) -> frozenset:
+    """
+    Return the labels and relationship types a query reads, for result-cache invalidation.
+
+    The match is conservative: a query with an unlabeled node pattern or a label expression
+    (`A|B`, `A&B`, `!A`, `%`, `n IS A`) may see entities outside its plain labels, so it gets
+    no tags and is invalidated by every write. Map keys and `::` type predicates are not labels.
+    """
+    if _UNLABELED_NODE_PATTERN.search(cypher_query):
+        return frozenset()
+    tokens = [
+        (kind, text)
+        for kind, text in _tokenize_cypher(cypher_query)
+        if kind not in ("space", "comment")
+    ]
+    tags = set()
+    brackets = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind == "symbol" and text in "([{":
+            brackets.append(text)
+        elif kind == "symbol" and text in ")]}":
+            if brackets:
+                brackets.pop()
+        elif (
+            kind == "identifier"
+            and text.upper() == "IS"
+            and index + 1 < len(tokens)
+            and tokens[index + 1][0] in ("identifier", "quoted")
+            and tokens[index + 1][1].upper() not in _IS_PREDICATE_WORDS
+        ):
+            return frozenset()
+        if text != ":" or kind != "symbol":
+            continue
+        before = tokens[index - 1][1] if index else None
+        after = tokens[index + 1] if index + 1 < len(tokens) else None
+        if before == ":" or (after is not None and after[1] == ":"):
+            continue  # x :: INTEGER
+        if (
+            brackets
+            and brackets[-1] == "{"
+            and index > 1
+            and tokens[index - 2][1] in "{,"
+        ):
+            continue  # {key: value}
+        if after is None or after[0] not in ("identifier", "quoted"):
+            return frozenset()
+        following = tokens[index + 2][1] if index + 2 < len(tokens) else None
+        if following in ("|", "&", "!", "%"):
+            return frozenset()
+        tags.add(
+            after[1][1:-1].replace("``", "`") if after[0] == "quoted" else after[1]
+        )
+    return frozenset(tags)
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate the in-memory size of a cached result in bytes."""
+    if hasattr(value, "memory_usage"):  # pandas DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes"):  # pyarrow Table, NumPy array
+        return int(value.nbytes)
+    return len(json.dumps(value, default=str))
+
+
+def _copy_result(value: Any) -> Any:
+    """Copy a result so callers cannot mutate a cached entry (Arrow tables are immutable)."""
+    if isinstance(value, list):
+        return copy.deepcopy(value)
+    return value.copy() if hasattr(value, "copy") else value
+
+
+def _new_schema() -> Dict[str, Any]:
+    return {"entities": {}, "relations": {}}
+
+
+def _add_entity(schema: Dict[str, Any], label: str, properties: List[str]) -> None:
+    if label not in schema["entities"]:
+        schema["entities"][label] = {
+            "attributes": [],
+            "relations": [],
+        }
+    schema["entities"][label]["attributes"] = list(
+        set(schema["entities"][label]["attributes"]) | set(properties)
+    )
+
+
+def _add_relation(
+    schema: Dict[str, Any],
+    relationship: str,
+    source_labels: List[str],
+    target_labels: List[str],
+    properties: Optional[List[str]] = None,
+    count: Optional[int] = None,
+) -> None:
+    if relationship not in schema["relations"]:
+        schema["relations"][relationship] = {
+            "source": None,
+            "target": None,
+            "attributes": [],
+            "endpoints": {},
+        }
+    relation = schema["relations"][relationship]
+    relation["attributes"] = list(set(relation["attributes"]) | set(properties or []))
+
+    # Every (source, target) label pair is kept; counts are summed per pair and stay
+    # None when the discovery strategy does not provide them.
+    for source in source_labels or [None]:
+        for target in target_labels or [None]:
+            previous = relation["endpoints"].get((source, target))
+            relation["endpoints"][(source, target)] = (
+                previous if count is None else (previous or 0) + count
+            )
+
+    # Update relations for source entity
+    for source in source_labels or []:
+        if source in schema["entities"]:
+            schema["entities"][source]["relations"].append(relationship)
+
+
+def _finalize_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    # Deduplicate relations for entities
+    for entity in schema["entities"]:
+        schema["entities"][entity]["relations"] = list(
+            set(schema["entities"][entity]["relations"])
+        )
+
+    # Flatten the endpoint pairs, most frequent first; "source"/"target" keep
+    # reporting the dominant pair for callers that expect a single mapping.
+    for relation in schema["relations"].values():
+        relation["endpoints"] = sorted(
+            (
+                {"source": source, "target": target, "count": count}
+                for (source, target), count in relation["endpoints"].items()
+            ),
+            key=lambda endpoint: -(endpoint["count"] or 0),
+        )
+        if relation["endpoints"]:
+            relation["source"] = relation["endpoints"][0]["source"]
+            relation["target"] = relation["endpoints"][0]["target"]
+    return schema
+
+
+def _quote_identifier(name: str) -> str:
+    """Backtick-quote a label or relationship type for safe interpolation into Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _parse_rel_type(rel_type: str) -> str:
+    """Turn the ":`TYPE`" notation returned by db.schema.relTypeProperties() into "TYPE"."""
+    rel_type = rel_type[1:] if rel_type.startswith(":") else rel_type
+    if rel_type.startswith("`") and rel_type.endswith("`"):
+        rel_type = rel_type[1:-1].replace("``", "`")
+    return rel_type
+
+
+_LABELS_QUERY = "CALL db.labels() YIELD label RETURN label"
+_RELATIONSHIP_TYPES_QUERY = (
+    "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"
+)
+_NODE_TYPE_PROPERTIES_QUERY = """
+    CALL db.schema.nodeTypeProperties() YIELD nodeLabels, propertyName
+    RETURN nodeLabels AS labels, collect(propertyName) AS properties
+"""
+_REL_TYPE_PROPERTIES_QUERY = """
+    CALL db.schema.relTypeProperties() YIELD relType, propertyName
+    RETURN relType, collect(propertyName) AS properties
+"""
+_VISUALIZATION_QUERY = (
+    "CALL db.schema.visualization() YIELD relationships RETURN relationships"
+)
+# Get all labels and their properties
+_SCAN_LABELS_QUERY = """
+    MATCH (n)
+    RETURN DISTINCT labels(n) AS labels, keys(n) AS properties
+"""
+# Get all relationship types and their source/target mappings,
+# aggregated server-side so only one row per endpoint pair is transferred
+_SCAN_RELATIONSHIPS_QUERY = """
+    MATCH (a)-[r]->(b)
+    RETURN type(r) AS relationship, labels(a) AS source, labels(b) AS target,
+        collect(DISTINCT keys(r)) AS property_sets, count(*) AS count
+"""
+
+
+def _label_queries(label: str, sample_size: Optional[int]) -> Tuple[str, str]:
+    """Return the count query and the (optionally sampled) key-set query for a label."""
+    quoted = _quote_identifier(label)
+    sample = "WITH n LIMIT $sample_size" if sample_size is not None else ""
+    # Label counts are served from the count store and do not scan the nodes.
+    return (
+        f"MATCH (n:{quoted}) RETURN count(n) AS total",
+        f"MATCH (n:{quoted}) {sample} RETURN keys(n) AS properties, count(*) AS count",
+    )
+
+
+def _relationship_type_queries(
+    relationship_type: str, sample_size: Optional[int]
+) -> Tuple[str, str]:
+    """Return the count query and the (optionally sampled) endpoint query for a type."""
+    quoted = _quote_identifier(relationship_type)
+    sample = "WITH a, r, b LIMIT $sample_size" if sample_size is not None else ""
+    return (
+        f"MATCH ()-[r:{quoted}]->() RETURN count(r) AS total",
+        f"""
+        MATCH (a)-[r:{quoted}]->(b) {sample}
+        RETURN labels(a) AS source, labels(b) AS target, keys(r) AS properties,
+            count(*) AS count
+        """,
+    )
+
+
+def _assemble_schema_by_label(
+    labels: List[str],
+    label_results: List[Tuple[set, int, int]],
+    relationship_types: List[str],
+    relationship_results: List[Tuple[List[Dict[str, Any]], int]],
+    sample_size: Optional[int],
+) -> Dict[str, Any]:
+    schema = _new_schema()
+    coverage = {"entities": {}, "relations": {}}
+    for label, (properties, sampled, total) in zip(labels, label_results):
+        if total == 0:
+            continue
+        _add_entity(schema, label, properties)
+        coverage["entities"][label] = {"sampled": sampled, "total": total}
+
+    for relationship_type, (rows, total) in zip(
+        relationship_types, relationship_results
+    ):
+        if total == 0:
+            continue
+        for row in rows:
+            _add_relation(
+                schema,
+                relationship_type,
+                row["source"],
+                row["target"],
+                row["properties"],
+                row["count"],
+            )
+        coverage["relations"][relationship_type] = {
+            "sampled": sum(row["count"] for row in rows),
+            "total": total,
+        }
+
+    if sample_size is not None:
+        schema["coverage"] = coverage
+    return _finalize_schema(schema)
+
+
+_CYPHER_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    |(?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    |(?P<quoted>`(?:[^`]|``)*`)
+    |(?P<parameter>\$(?:\w+|`[^`]*`))
+    |(?P<identifier>[^\W\d]\w*)
+    |(?P<number>
+        0[xX][0-9a-fA-F_]+
+        |0[oO][0-7_]+
+        |(?:\d[\d_]*)?\.\d[\d_]*(?:[eE][+-]?\d[\d_]*)?
+        |\d[\d_]*(?:[eE][+-]?\d[\d_]*)?
+    )
+    |(?P<symbol>\.\.|<>|<=|>=|=~|->|<-|\+=|.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_STRING_ESCAPE_PATTERN = re.compile(r"\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)", re.DOTALL)
+
+_STRING_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+@functools.lru_cache(maxsize=1024)
+def _tokenize_cypher(cypher_query: str) -> Tuple[Tuple[str, str], ...]:
+    """Split a query into (kind, text) tokens; strings, comments and quoted names stay whole."""
+    return tuple(
+        (match.lastgroup, match.group())
+        for match in _CYPHER_TOKEN_PATTERN.finditer(cypher_query)
+    )
+
+
+_WRITE_CLAUSES = frozenset(
+    ("CREATE", "MERGE", "SET", "DELETE", "DETACH", "REMOVE", "FOREACH")
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_write_query(cypher_query: str) -> bool:
+    """Whether a query contains a write clause (outside strings, comments and names)."""
+    previous = None
+    for kind, text in _tokenize_cypher(cypher_query):
+        if kind in ("space", "comment"):
+            continue
+        if (
+            kind == "identifier"
+            and previous not in (".", ":", "$")
+            and text.upper() in _WRITE_CLAUSES
+        ):
+            return True
+        previous = text
+    return False
+
+
+@functools.lru_cache(maxsize=1024)
+def _runs_in_transactions(cypher_query: str) -> bool:
+    """
+    Whether a query has a top-level `CALL { ... } IN [n] [CONCURRENT] TRANSACTIONS`.
+
+    Such queries commit their own batches, so they must run as auto-commit queries rather
+    than inside a managed (explicit) transaction.
+    """
+    tokens = [
+        (kind, text.upper())
+        for kind, text in _tokenize_cypher(cypher_query)
+        if kind not in ("space", "comment")
+    ]
+    depth = 0
+    for index, (kind, text) in enumerate(tokens):
+        if kind == "symbol" and text in ("(", "[", "{"):
+            depth += 1
+        elif kind == "symbol" and text in (")", "]", "}"):
+            depth = max(depth - 1, 0)
+        elif (
+            depth == 0
+            and kind == "identifier"
+            and text == "IN"
+            and index
+            and tokens[index - 1][1] == "}"
+        ):
+            following = [word for _, word in tokens[index + 1 : index + 4]]
+            if "TRANSACTIONS" in following:
+                return True
+    return False
+
+
+def _unquote_string(text: str) -> str:
+    def unescape(match):
+        escape = match.group(1)
+        if escape[0] in "uU" and len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return _STRING_ESCAPES.get(escape, escape)
+
+    return _STRING_ESCAPE_PATTERN.sub(unescape, text[1:-1])
+
+
+def _number_value(text: str) -> Union[int, float]:
+    text = text.replace("_", "")
+    if text[:2] in ("0x", "0X"):
+        return int(text, 16)
+    if text[:2] in ("0o", "0O"):
+        return int(text, 8)
+    return float(text) if any(char in text for char in ".eE") else int(text)
+
+
+# Clauses that end the `CYPHER ...` pre-parser options at the start of a query.
+_CLAUSE_KEYWORDS = frozenset(
+    (
+        "MATCH",
+        "OPTIONAL",
+        "CREATE",
+        "MERGE",
+        "WITH",
+        "RETURN",
+        "UNWIND",
+        "CALL",
+        "USE",
+        "LOAD",
+        "FOREACH",
+        "SHOW",
+        "DROP",
+        "ALTER",
+        "GRANT",
+        "DENY",
+        "REVOKE",
+        "START",
+        "STOP",
+        "TERMINATE",
+        "ENABLE",
+        "RENAME",
+        "FINISH",
+    )
+)
+
+# Schema and administration commands; their literals are left alone.
+_ADMIN_COMMANDS = frozenset(
+    (
+        "SHOW",
+        "DROP",
+        "ALTER",
+        "GRANT",
+        "DENY",
+        "REVOKE",
+        "START",
+        "STOP",
+        "TERMINATE",
+        "ENABLE",
+        "RENAME",
+    )
+)
+
+_ADMIN_CREATE_TARGETS = frozenset(
+    (
+        "INDEX",
+        "CONSTRAINT",
+        "RANGE",
+        "TEXT",
+        "POINT",
+        "LOOKUP",
+        "FULLTEXT",
+        "VECTOR",
+        "BTREE",
+        "DATABASE",
+        "COMPOSITE",
+        "ALIAS",
+        "USER",
+        "ROLE",
+        "SERVER",
+        "OR",
+    )
+)
+
+# Numbers that must stay literal because of the keyword before (or after) them.
+_INLINE_NUMBER_AFTER = frozenset(("SHORTEST", "ANY", "COMMIT"))
+_INLINE_NUMBER_BEFORE = frozenset(("GROUPS", "CONCURRENT"))
+# Strings the grammar requires as literals, e.g. LOAD CSV ... FIELDTERMINATOR ';'.
+_INLINE_STRING_AFTER = frozenset(("FIELDTERMINATOR",))
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_cypher(cypher_query: str) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Lift string and number literals into $__lit<n> parameters and canonicalize whitespace.
+
+    Comments are dropped and whitespace runs collapse to one space, so queries that only differ
+    in literal values or layout share one template (and one server-side plan). Literals that
+    cannot be parameters stay inline: `CYPHER` pre-parser options, variable-length bounds such
+    as *1..3, quantifiers such as {1,3}, path selectors such as SHORTEST 2, the LOAD CSV field
+    terminator, and everything in schema and administration commands.
+
+    :return: The template and the lifted literal values, in parameter order
+    """
+    tokens = [
+        ("space" if kind == "comment" else kind, text)
+        for kind, text in _tokenize_cypher(cypher_query)
+    ]
+    significant = [(kind, text.upper()) for kind, text in tokens if kind != "space"]
+    keywords = [text for kind, text in significant if kind == "identifier"]
+    while keywords and keywords[0] in ("EXPLAIN", "PROFILE"):
+        keywords.pop(0)
+    in_options = bool(keywords) and keywords[0] == "CYPHER"
+    if in_options:
+        keywords = keywords[
+            next(
+                (i for i, word in enumerate(keywords) if word in _CLAUSE_KEYWORDS),
+                len(keywords),
+            ) :
+        ]
+    lift = not keywords or not (
+        keywords[0] in _ADMIN_COMMANDS
+        or (
+            keywords[0] == "CREATE"
+            and len(keywords) > 1
+            and keywords[1] in _ADMIN_CREATE_TARGETS
+        )
+    )
+
+    parts = []
+    literals = []
+    previous = None
+    in_quantifier = False
+    position = -1
+    for index, (kind, text) in enumerate(tokens):
+        if kind == "space":
+            continue
+        position += 1
+        if in_options and kind == "identifier" and text.upper() in _CLAUSE_KEYWORDS:
+            in_options = False
+        if parts and tokens[index - 1][0] == "space":
+            parts.append(" ")
+        if kind == "symbol" and text == "{":
+            following = next(
+                (token for token in tokens[index + 1 :] if token[0] != "space"), None
+            )
+            in_quantifier = following is not None and (
+                following[0] == "number" or following[1] == ","
+            )
+        elif kind == "symbol" and text == "}":
+            in_quantifier = False
+
+        following = (
+            significant[position + 1] if position + 1 < len(significant) else None
+        )
+        inline = (
+            not lift
+            or in_options
+            or (
+                kind == "number"
+                and (
+                    in_quantifier
+                    or previous in ("*", "..")
+                    or (previous or "").upper() in _INLINE_NUMBER_AFTER
+                    or (following is not None and following[1] in _INLINE_NUMBER_BEFORE)
+                )
+            )
+            or (kind == "string" and (previous or "").upper() in _INLINE_STRING_AFTER)
+        )
+        if kind in ("string", "number") and not inline:
+            parts.append(f"$__lit{len(literals)}")
+            literals.append(
+                _unquote_string(text) if kind == "string" else _number_value(text)
+            )
+        else:
+            parts.append(text)
+        previous = text
+    return "".join(parts), tuple(literals)
+
+
+_PAGE_MODIFIERS = ("ORDER", "SKIP", "OFFSET", "LIMIT")
+
+# Symbols, and keywords, after which RETURN/SKIP/LIMIT/... are names rather than clause
+# keywords; a keyword only counts when it is not itself a name (`WITH n AS return RETURN return`).
+_NAME_PREFIX_SYMBOLS = (".", ":", ",", "$")
+_NAME_PREFIX_KEYWORDS = ("AS", "RETURN", "WITH", "DISTINCT")
+
+
+@dataclass(frozen=True)
+class _QueryShape(object):
+    """
+    Where the outermost (top-level) RETURN of a query and its modifiers sit.
+
+    Offsets index into the query string. `skip` and `limit` are (start, end, value) spans of the
+    final RETURN's SKIP/OFFSET and LIMIT clauses, where value is the (kind, text) of a single
+    number or parameter token, or None for any other expression.
+    """
+
+    return_start: Optional[int] = None
+    return_end: Optional[int] = None
+    modifiers_start: Optional[int] = None
+    end: int = 0
+    union: bool = False
+    skip: Optional[Tuple[int, int, Optional[Tuple[str, str]]]] = None
+    limit: Optional[Tuple[int, int, Optional[Tuple[str, str]]]] = None
+
+
+@functools.lru_cache(maxsize=1024)
+def _analyze_query(cypher_query: str) -> _QueryShape:
+    """
+    Locate the outermost RETURN clause and its ORDER BY/SKIP/LIMIT modifiers.
+
+    Keywords only count at bracket depth 0 and outside strings, comments, quoted names,
+    property keys and aliases, so a `limit` property, a LIMIT inside a subquery or a string
+    literal are not mistaken for the query's own pagination.
+    """
+    tokens = []  # (kind, text, start, end, depth) of every significant token
+    position = 0
+    depth = 0
+    for kind, text in _tokenize_cypher(cypher_query):
+        start, position = position, position + len(text)
+        if kind in ("space", "comment"):
+            continue
+        if kind == "symbol" and text in (")", "]", "}"):
+            depth = max(depth - 1, 0)
+        tokens.append((kind, text, start, position, depth))
+        if kind == "symbol" and text in ("(", "[", "{"):
+            depth += 1
+
+    # Trailing whitespace and comments are not part of the query body.
+    end = tokens[-1][3] if tokens else 0
+    clauses = []  # (keyword, token index) of top-level clause keywords
+    keywords = set()  # indices of top-level identifiers that act as keywords
+    for index, (kind, text, start, _, token_depth) in enumerate(tokens):
+        if token_depth:
+            continue
+        if kind == "symbol" and text == ";":
+            end = start
+            break
+        if kind != "identifier":
+            continue
+        previous = tokens[index - 1] if index else None
+        following = tokens[index + 1][1].upper() if index + 1 < len(tokens) else None
+        keyword = text.upper()
+        if previous is not None and (
+            (previous[0] == "symbol" and previous[1] in _NAME_PREFIX_SYMBOLS)
+            or (index - 1 in keywords and previous[1].upper() in _NAME_PREFIX_KEYWORDS)
+        ):
+            continue
+        keywords.add(index)
+        if keyword in ("RETURN", "UNION", "SKIP", "OFFSET", "LIMIT") or (
+            keyword == "ORDER" and following == "BY"
+        ):
+            clauses.append((keyword, index))
+
+    returns = [
+        position for position, (keyword, _) in enumerate(clauses) if keyword == "RETURN"
+    ]
+    if not returns:
+        return _QueryShape(end=end)
+    return_index = clauses[returns[-1]][1]
+    modifiers = [
+        (keyword, index)
+        for keyword, index in clauses[returns[-1] + 1 :]
+        if keyword in _PAGE_MODIFIERS
+    ]
+    spans = {}
+    for position, (keyword, index) in enumerate(modifiers):
+        span_end = (
+            tokens[modifiers[position + 1][1]][2]
+            if position + 1 < len(modifiers)
+            else end
+        )
+        expression = [token for token in tokens[index + 1 :] if token[2] < span_end]
+        value = (
+            expression[0][:2]
+            if len(expression) == 1 and expression[0][0] in ("number", "parameter")
+            else None
+        )
+        if keyword != "ORDER":
+            spans["LIMIT" if keyword == "LIMIT" else "SKIP"] = (
+                tokens[index][2],
+                span_end,
+                value,
+            )
+    return _QueryShape(
+        return_start=tokens[return_index][2],
+        return_end=tokens[return_index][3],
+        modifiers_start=tokens[modifiers[0][1]][2] if modifiers else end,
+        end=end,
+        union=any(keyword == "UNION" for keyword, _ in clauses),
+        skip=spans.get("SKIP"),
+        limit=spans.get("LIMIT"),
+    )
+
+
+def _clause_value(
+    span: Optional[Tuple[int, int, Optional[Tuple[str, str]]]],
+    parameters: Dict[str, Any],
+) -> Optional[int]:
+    """Resolve a SKIP/LIMIT clause to an integer, or None if it is an expression."""
+    kind, text = span[2] or (None, None)
+    if kind == "number" and text.isdigit():
+        return int(text)
+    if kind == "parameter":
+        value = parameters.get(text[1:].strip("`"))
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _build_page_query(
+    cypher_query: str,
+    parameters: Optional[Dict[str, Any]],
+    skip: int,
+    limit: int,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Page the result of the outermost RETURN.
+
+    A query without SKIP/LIMIT gets them appended. Existing numeric or parameter SKIP/LIMIT
+    clauses are tightened so the page stays inside the window they select; UNION queries and
+    expression-valued clauses are wrapped in a subquery and paged from outside. Queries
+    without a top-level RETURN (e.g. standalone procedure calls) are run unchanged.
+    """
+    _parameters = dict(parameters or {})
+    shape = _analyze_query(cypher_query)
+    if shape.return_start is None:
+        return cypher_query, _parameters
+
+    body = cypher_query[: shape.end]
+    existing_skip = _clause_value(shape.skip, _parameters) if shape.skip else 0
+    existing_limit = _clause_value(shape.limit, _parameters) if shape.limit else None
+    if shape.union or existing_skip is None or (shape.limit and existing_limit is None):
+        _parameters.update({"__skip": skip, "__limit": limit})
+        return (
+            f"CALL (*) {{ {body} }} RETURN * SKIP $__skip LIMIT $__limit",
+            _parameters,
+        )
+
+    for start, end, _ in sorted(
+        (span for span in (shape.skip, shape.limit) if span), reverse=True
+    ):
+        body = body[:start] + body[end:]
+    if existing_limit is not None:
+        limit = max(0, min(limit, existing_limit - skip))
+    _parameters.update({"__skip": existing_skip + skip, "__limit": limit})
+    return f"{body.rstrip()} SKIP $__skip LIMIT $__limit", _parameters
+
+
+def _build_count_query(cypher_query: str, cap: Optional[int] = None) -> str:
+    # Modify the query to get the total count (trailing comments and ";" would break the wrapper)
+    body = cypher_query[: _analyze_query(cypher_query).end]
+    if cap is None:
+        return "CALL (*) { " f"{body} " "} RETURN count(*) as total"
+    # The LIMIT stops pulling rows from the subquery once $__cap rows have been counted.
+    return "CALL (*) { " f"{body} " "} WITH * LIMIT $__cap RETURN count(*) as total"
+
+
+_CAPPED_TOTAL_PATTERN = re.compile(r"capped:([1-9]\d*)")
+
+
+def _total_mode(get_total: Union[bool, str]) -> str:
+    if get_total == "estimated":
+        return "estimated"
+    if isinstance(get_total, str) and get_total.startswith("capped:"):
+        if not _CAPPED_TOTAL_PATTERN.fullmatch(get_total):
+            raise ValueError('get_total="capped:N" requires a positive integer N.')
+        return get_total
+    if isinstance(get_total, str):
+        raise ValueError(
+            f'get_total must be a bool, "estimated" or "capped:N", got {get_total!r}.'
+        )
+    return "exact"
+
+
+def _total_cap(mode: str) -> Optional[int]:
+    return int(mode.split(":", 1)[1]) if mode.startswith("capped:") else None
+
+
+def _report_total(total: int, mode: str) -> Union[int, Dict[str, Any]]:
+    """Counts run one row past a cap, so reaching the cap shows up as total > cap."""
+    cap = _total_cap(mode)
+    if cap is None:
+        return total
+    return {"total": min(total, cap), "capped": total > cap}
+
+
+def _estimated_rows(summary: Any) -> int:
+    # EXPLAIN only plans the query; the root operator carries the row estimate.
+    return int(round(summary.plan["args"].get("EstimatedRows", 0)))
+
+
+def _build_cursor_query(
+    cypher_query: str,
+    cursor_key: str,
+    parameters: Optional[Dict[str, Any]],
+    limit: int,
+    cursor: Optional[str],
+) -> Tuple[str, Dict[str, Any]]:
+    shape = _analyze_query(cypher_query)
+    if shape.return_start is None:
+        raise ValueError("Cursor pagination requires a query with a RETURN clause.")
+    if shape.union:
+        raise ValueError("Cursor pagination does not support UNION queries.")
+    if shape.modifiers_start < shape.end:
+        # The keyset ordering and page limit would silently replace them.
+        raise ValueError(
+            "Cursor pagination does not support ORDER BY, SKIP or LIMIT after the final "
+            "RETURN; the page is ordered by cursor_key and limited by limit."
+        )
+    prefix = cypher_query[: shape.return_start]
+    projection = cypher_query[shape.return_end : shape.modifiers_start].strip()
+    if _is_aggregating_projection(projection):
+        # The page limit would be applied before the grouping, splitting groups across pages.
+        raise ValueError(
+            "Cursor pagination does not support DISTINCT or aggregating RETURN clauses; "
+            "group in a WITH clause and RETURN its columns instead."
+        )
+
+    _cypher_query = (
+        f"{prefix} "
+        f"WITH *, {cursor_key} AS __cursor_key "
+        "WHERE __cursor_key IS NOT NULL "
+        "AND ($__cursor IS NULL OR __cursor_key > $__cursor) "
+        "WITH * ORDER BY __cursor_key LIMIT $__limit "
+        f"RETURN {projection}" + ("" if projection == "*" else ", __cursor_key")
+    )
+    _parameters = dict(parameters or {})
+    _parameters.update(
+        {
+            "__cursor": _decode_cursor(cursor) if cursor else None,
+            "__limit": limit,
+        }
+    )
+    return _cypher_query, _parameters
+
+
+_AGGREGATING_FUNCTIONS = frozenset(
+    (
+        "AVG",
+        "COLLECT",
+        "COUNT",
+        "MAX",
+        "MIN",
+        "PERCENTILECONT",
+        "PERCENTILEDISC",
+        "STDEV",
+        "STDEVP",
+        "SUM",
+    )
+)
+
+
+def _is_aggregating_projection(projection: str) -> bool:
+    """Whether a RETURN projection is DISTINCT or calls an aggregating function."""
+    tokens = [
+        (kind, text)
+        for kind, text in _tokenize_cypher(projection)
+        if kind not in ("space", "comment")
+    ]
+    if tokens and tokens[0][1].upper() == "DISTINCT":
+        return True
+    braces = 0
+    for index, (kind, text) in enumerate(tokens):
+        if text == "{":
+            braces += 1  # COUNT { ... } and COLLECT { ... } subqueries do not aggregate
+        elif text == "}":
+            braces -= 1
+        elif (
+            braces == 0
+            and kind == "identifier"
+            and text.upper() in _AGGREGATING_FUNCTIONS
+            and index + 1 < len(tokens)
+            and tokens[index + 1][1] == "("
+            and (index == 0 or tokens[index - 1][1] != ".")
+        ):
+            return True
+    return False
+
+
+def _next_cursor(
+    results: List[Dict[str, Any]], last_key: Any, limit: int
+) -> Optional[str]:
+    """Strip the ordering key from a cursor page and turn the last one into a token."""
+    for record in results:
+        record.pop("__cursor_key", None)
+    return _encode_cursor(last_key) if len(results) == limit else None
+
+
+def _submit_in_context(pool: ThreadPoolExecutor, function: Any, *args: Any) -> Any:
+    """Submit to a pool so the task sees the caller's context variables (e.g. bookmarks)."""
+    return pool.submit(contextvars.copy_context().run, function, *args)
+
+
+def _start_detached(coroutine: Any) -> Any:
+    """
+    Start a background task in an empty context.
+
+    A task normally copies the caller's context, so a background refresh or PROFILE would
+    report into the instrumented call (and request bookmarks) that happened to trigger it.
+    """
+    return contextvars.Context().run(asyncio.ensure_future, coroutine)
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split any iterable (including generators) into lists of at most `size` items."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _node_upsert_query(label: str, key: str) -> str:
+    quoted_key = _quote_identifier(key)
+    return (
+        "UNWIND $rows AS row "
+        f"MERGE (n:{_quote_identifier(label)} {{{quoted_key}: row.{quoted_key}}}) "
+        "SET n += row"
+    )
+
+
+def _relationship_upsert_query(
+    relationship_type: str,
+    source_label: str,
+    source_key: str,
+    target_label: str,
+    target_key: str,
+) -> str:
+    return (
+        "UNWIND $rows AS row "
+        f"MATCH (a:{_quote_identifier(source_label)} "
+        f"{{{_quote_identifier(source_key)}: row.source}}) "
+        f"MATCH (b:{_quote_identifier(target_label)} "
+        f"{{{_quote_identifier(target_key)}: row.target}}) "
+        f"MERGE (a)-[r:{_quote_identifier(relationship_type)}]->(b) "
+        "SET r += coalesce(row.properties, {})"
+    )
+
+
+_WRITE_COUNTERS = (
+    "nodes_created",
+    "nodes_deleted",
+    "relationships_created",
+    "relationships_deleted",
+    "properties_set",
+    "labels_added",
+)
+
+
+def _run_write(tx: Any, cypher_query: str, parameters: Dict[str, Any]) -> Any:
+    return tx.run(cypher_query, parameters).consume()
+
+
+def _batch_report(
+    index: int, rows: int, seconds: float, summary: Any
+) -> Dict[str, Any]:
+    return {
+        "batch": index,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else None,
+        "counters": {name: getattr(summary.counters, name) for name in _WRITE_COUNTERS},
+    }
+
+
+def _ingestion_report(batches: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    rows = sum(batch["rows"] for batch in batches)
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else None,
+        "batches": batches,
+    }
+
+
+def _key_partition(label: str, value: Any, partitions: int) -> int:
+    """Stable partition of a node identified by (label, key value)."""
+    return (
+        zlib.crc32(json.dumps([label, value], default=str).encode("utf-8")) % partitions
+    )
+
+
+def _partition_rounds(
+    rows: List[Dict[str, Any]],
+    source_label: str,
+    target_label: str,
+    partitions: int,
+) -> List[List[Tuple[Tuple[int, int], List[Dict[str, Any]]]]]:
+    """
+    Group relationship rows into rounds of cells that never share a node.
+
+    Every endpoint is hashed into one of `partitions` node partitions and a row goes to the
+    cell {source partition, target partition}. Round r holds the cells {i, j} with
+    (i + j) % partitions == r, in which every partition appears in exactly one cell, so the
+    cells of a round can be written concurrently without contending for node locks.
+    """
+    cells = {}
+    for row in rows:
+        i = _key_partition(source_label, row["source"], partitions)
+        j = _key_partition(target_label, row["target"], partitions)
+        cells.setdefault((min(i, j), max(i, j)), []).append(row)
+
+    rounds = [[] for _ in range(partitions)]
+    for (i, j), cell_rows in sorted(cells.items()):
+        rounds[(i + j) % partitions].append(((i, j), cell_rows))
+    return [cells_in_round for cells_in_round in rounds if cells_in_round]
+
+
+def _serialize_point(point: Point) -> Dict[str, Any]:
+    return dict(zip(("srid", "x", "y", "z"), (point.srid, *point)))
+
+
+_IDENTITY = lambda value: value  # noqa: E731
+
+
+class _Serializer(object):
+    """
+    Convert driver values into plain Python in one pass.
+
+    Converters are keyed by type; subclasses resolve through their MRO once and are cached,
+    so Duration and Point (tuple subclasses) win over the generic tuple converter. Points
+    become {srid, x, y[, z]}, durations ISO 8601 strings, dates and datetimes ISO strings and
+    times `datetime.time`; lists and maps are converted recursively.
+
+    Graph entities keep the `Record.data()` shape by default: a node is its property dict, a
+    relationship a (start properties, type, end properties) tuple and a path an alternating
+    list of node property dicts and relationship types. With entities=True they become dicts
+    carrying element ids, labels or type, endpoints and properties instead.
+    """
+
+    def __init__(self, entities: bool = False) -> None:
+        self.converters = {
+            str: _IDENTITY,
+            int: _IDENTITY,
+            float: _IDENTITY,
+            bool: _IDENTITY,
+            type(None): _IDENTITY,
+            bytes: _IDENTITY,
+            list: lambda value: [self(item) for item in value],
+            tuple: lambda value: [self(item) for item in value],
+            dict: lambda value: {key: self(item) for key, item in value.items()},
+            Node: self._node if entities else self._properties,
+            Relationship: self._relationship if entities else self._relationship_data,
+            Path: self._path if entities else self._path_data,
+            Point: _serialize_point,
+            Duration: lambda value: value.iso_format(),
+            Date: lambda value: value.iso_format(),
+            DateTime: lambda value: value.to_native().isoformat(),
+            Time: lambda value: value.to_native(),
+        }
+
+    def __call__(self, value: Any) -> Any:
+        converter = self.converters.get(type(value))
+        if converter is None:
+            converter = self._resolve(type(value))
+        return converter(value)
+
+    def _resolve(self, value_type: type) -> Any:
+        for base in value_type.__mro__:
+            if base in self.converters:
+                converter = self.converters[base]
+                break
+        else:
+            converter = (
+                (lambda value: value.to_native())
+                if hasattr(value_type, "to_native")
+                else _IDENTITY
+            )
+        self.converters[value_type] = converter
+        return converter
+
+    def _properties(self, entity: Any) -> Dict[str, Any]:
+        return {key: self(value) for key, value in entity.items()}
+
+    def _relationship_data(self, relationship: Relationship) -> Tuple[Any, ...]:
+        return (
+            self._properties(relationship.start_node),
+            relationship.type,
+            self._properties(relationship.end_node),
+        )
+
+    def _path_data(self, path: Path) -> List[Any]:
+        data = [self._properties(path.start_node)]
+        for relationship, node in zip(path.relationships, path.nodes[1:]):
+            data.extend((relationship.type, self._properties(node)))
+        return data
+
+    def _node(self, node: Node) -> Dict[str, Any]:
+        return {
+            "element_id": node.element_id,
+            "labels": sorted(node.labels),
+            "properties": self._properties(node),
+        }
+
+    def _relationship(self, relationship: Relationship) -> Dict[str, Any]:
+        return {
+            "element_id": relationship.element_id,
+            "type": relationship.type,
+            "start": relationship.start_node.element_id,
+            "end": relationship.end_node.element_id,
+            "properties": self._properties(relationship),
+        }
+
+    def _path(self, path: Path) -> Dict[str, Any]:
+        return {
+            "nodes": [self._node(node) for node in path.nodes],
+            "relationships": [
+                self._relationship(relationship) for relationship in path.relationships
+            ],
+        }
+
+
+_serialize = _Serializer()
+_serialize_entities = _Serializer(entities=True)
+
+
+def _convert_record(record: Any, serialize: Any = _serialize) -> Dict[str, Any]:
+    return {key: serialize(value) for key, value in record.items()}
+
+
+_RESULT_FORMATS = ("records", "arrow", "numpy", "pandas")
+
+_TEMPORAL_NUMPY_TYPES = {DateTime: "datetime64[us]", Date: "datetime64[D]"}
+
+_NUMPY_TYPES = {int: "i8", float: "f8", bool: "?", str: "O"}
+
+
+def _check_result_format(result_format: str) -> None:
+    if result_format not in _RESULT_FORMATS:
+        raise ValueError(
+            f"result_format must be one of {', '.join(_RESULT_FORMATS)}, got {result_format!r}."
+        )
+    module = {"arrow": pa, "numpy": np}.get(result_format, True)
+    if module is None:
+        raise ImportError(
+            f'result_format="{result_format}" requires the "{result_format}" extra: '
+            f"pip install Neo4j-Graph-Connector[{result_format}]"
+        )
+
+
+def _column_type(values: List[Any]) -> Optional[type]:
+    """Return the type shared by every non-null value of a column, or None if mixed or empty."""
+    column_type = None
+    for value in values:
+        if value is None:
+            continue
+        if column_type is None:
+            column_type = type(value)
+        elif type(value) is not column_type:
+            return None
+    return column_type
+
+
+def _native_datetime(value: DateTime) -> datetime.datetime:
+    native = value.to_native()
+    if native.tzinfo is None:
+        return native
+    return native.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _numpy_column(values: List[Any], serialize: Any = _serialize) -> Any:
+    column_type = _column_type(values)
+    has_nulls = any(value is None for value in values)
+    if column_type is DateTime:
+        # Zoned datetimes are normalised to UTC; nulls become NaT.
+        return np.array(
+            [None if value is None else _native_datetime(value) for value in values],
+            dtype=_TEMPORAL_NUMPY_TYPES[DateTime],
+        )
+    if column_type is Date:
+        return np.array(
+            [None if value is None else value.to_native() for value in values],
+            dtype=_TEMPORAL_NUMPY_TYPES[Date],
+        )
+    if column_type is int and has_nulls:
+        # Nulls become NaN, so the column widens to float.
+        return np.array(values, dtype="f8")
+    if column_type in _NUMPY_TYPES and not (column_type is bool and has_nulls):
+        return np.array(values, dtype=_NUMPY_TYPES[column_type])
+    column = np.empty(len(values), dtype="O")
+    column[:] = [serialize(value) for value in values]
+    return column
+
+
+def _arrow_column(values: List[Any], serialize: Any = _serialize) -> Any:
+    column_type = _column_type(values)
+    if column_type in _NUMPY_TYPES:
+        # Pyarrow converts builtin scalars (and None as null) in a single native pass.
+        return pa.array(values)
+    if column_type in _TEMPORAL_NUMPY_TYPES:
+        return pa.array(
+            [None if value is None else value.to_native() for value in values]
+        )
+    serialized = [serialize(value) for value in values]
+    try:
+        return pa.array(serialized)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Arrow has no object type: heterogeneous columns are kept as JSON text.
+        return pa.array(
+            [
+                None if value is None else json.dumps(value, default=str)
+                for value in serialized
+            ]
+        )
+
+
+def _column_appenders(keys: List[str]) -> Tuple[List[List[Any]], List[Any]]:
+    """Return one empty list per column and their append methods, to fill from a stream."""
+    columns = [[] for _ in keys]
+    return columns, [column.append for column in columns]
+
+
+def _build_columns(
+    keys: List[str],
+    columns: List[List[Any]],
+    result_format: str,
+    serialize: Any = _serialize,
+) -> Any:
+    """
+    Build a pyarrow Table or a NumPy structured array from raw column values.
+
+    Every column is converted as a whole: numeric, boolean and string columns go straight
+    into typed buffers, while other values (graph entities, maps, lists, mixed columns) fall
+    back to the record serializer. Temporal columns become timestamp/datetime64 buffers, but
+    the driver hands them over as neo4j.time objects, so each value is still converted to a
+    native datetime one row at a time.
+    """
+    rows = len(columns[0]) if columns else 0
+    if result_format == "arrow":
+        return pa.Table.from_arrays(
+            [_arrow_column(column, serialize) for column in columns], names=list(keys)
+        )
+
+    arrays = [_numpy_column(column, serialize) for column in columns]
+    table = np.empty(
+        rows, dtype=[(key, array.dtype) for key, array in zip(keys, arrays)]
+    )
+    for key, array in zip(keys, arrays):
+        table[key] = array
+    return table
+
+
+# Instrumentation. While an instrumented connector call runs, _QUERY_EVENT holds its event;
+# every transaction function run on its behalf (in this thread or task, or in a worker that
+# inherited the context) appends a record to event["queries"], and _QUERY_STATS points the
+# client-side conversion at that record.
+
+_QUERY_EVENT = contextvars.ContextVar("neo4j_query_event", default=None)
+
+_QUERY_STATS = contextvars.ContextVar("neo4j_query_stats", default=None)
+
+# (transaction function name, result summary, use_writer) of every statement of the current
+# event; kept out of the event itself so hooks never see parameter values.
+_QUERY_SUMMARIES = contextvars.ContextVar("neo4j_query_summaries", default=None)
+
+# Transaction functions that fetch the page itself (rather than its count).
+_PAGE_READS = (
+    "_read_records",
+    "_read_columns",
+    "_read_cursor_page",
+    "_async_read_records",
+    "_async_read_columns",
+    "_async_read_cursor_page",
+)
+
+_EVENT_TIMINGS = (
+    "connection_acquisition_ms",
+    "result_available_after_ms",
+    "result_consumed_after_ms",
+    "conversion_ms",
+)
+
+
+class _TracedTransaction(object):
+    """Transaction proxy that remembers the results it ran, to read their summaries afterwards."""
+
+    def __init__(self, tx: Any) -> None:
+        self._tx = tx
+        self.results = []
+
+    def run(self, *args: Any, **kwargs: Any) -> Any:
+        result = self._tx.run(*args, **kwargs)
+        self.results.append(result)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tx, name)
+
+
+class _AsyncTracedTransaction(_TracedTransaction):
+    async def run(self, *args: Any, **kwargs: Any) -> Any:
+        result = await self._tx.run(*args, **kwargs)
+        self.results.append(result)
+        return result
+
+
+def _statement_timings(summary: Any) -> Dict[str, Any]:
+    return {
+        "query": getattr(summary.query, "text", summary.query),
+        "result_available_after_ms": summary.result_available_after,
+        "result_consumed_after_ms": summary.result_consumed_after,
+    }
+
+
+def _new_query_stats(work: Any, attempt: int, requested: float) -> Dict[str, Any]:
+    # The first callback follows the session acquiring a connection and beginning the
+    # transaction; replays also include the failed attempts before them.
+    return {
+        "transaction_function": getattr(work, "__name__", repr(work)),
+        "attempt": attempt,
+        "connection_acquisition_ms": (time.perf_counter() - requested) * 1000,
+        "conversion_ms": 0.0,
+        "statements": [],
+    }
+
+
+def _traced(work: Any, use_writer: bool = False) -> Any:
+    """Wrap a transaction function so it reports its timings to the current event, if any."""
+    event = _QUERY_EVENT.get()
+    if event is None:
+        return work
+    requested = time.perf_counter()
+    attempts = []
+
+    def run(tx: Any, *args: Any) -> Any:
+        attempts.append(None)
+        stats = _new_query_stats(work, len(attempts), requested)
+        traced = _TracedTransaction(tx)
+        token = _QUERY_STATS.set(stats)
+        try:
+            value = work(traced, *args)
+            summaries = [result.consume() for result in traced.results]
+            stats["statements"] = [_statement_timings(summary) for summary in summaries]
+            captured = _QUERY_SUMMARIES.get()
+            if captured is not None:
+                captured.extend(
+                    (stats["transaction_function"], summary, use_writer)
+                    for summary in summaries
+                )
+            return value
+        finally:
+            _QUERY_STATS.reset(token)
+            event["queries"].append(stats)
+
+    return run
+
+
+def _async_traced(work: Any, use_writer: bool = False) -> Any:
+    """Async counterpart of _traced for AsyncNeo4jConnector transaction functions."""
+    event = _QUERY_EVENT.get()
+    if event is None:
+        return work
+    requested = time.perf_counter()
+    attempts = []
+
+    async def run(tx: Any, *args: Any) -> Any:
+        attempts.append(None)
+        stats = _new_query_stats(work, len(attempts), requested)
+        traced = _AsyncTracedTransaction(tx)
+        token = _QUERY_STATS.set(stats)
+        try:
+            value = await work(traced, *args)
+            summaries = [await result.consume() for result in traced.results]
+            stats["statements"] = [_statement_timings(summary) for summary in summaries]
+            captured = _QUERY_SUMMARIES.get()
+            if captured is not None:
+                captured.extend(
+                    (stats["transaction_function"], summary, use_writer)
+                    for summary in summaries
+                )
+            return value
+        finally:
+            _QUERY_STATS.reset(token)
+            event["queries"].append(stats)
+
+    return run
+
+
+def _convert(function: Any, *args: Any) -> Any:
+    """Run a client-side conversion, charging its time to the instrumented query (if any)."""
+    stats = _QUERY_STATS.get()
+    if stats is None:
+        return function(*args)
+    started = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        stats["conversion_ms"] += (time.perf_counter() - started) * 1000
+
+
+def _convert_records(
+    records: List[Any], serialize: Any = _serialize
+) -> List[Dict[str, Any]]:
+    return [_convert_record(record, serialize) for record in records]
+
+
+def _parameter_shapes(parameters: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Describe parameters by type only, e.g. {"ids": "list[int]"}, so no values are logged."""
+
+    def shape(value: Any) -> str:
+        if isinstance(value, (list, tuple)):
+            kinds = sorted({shape(item) for item in value})
+            return f"list[{'|'.join(kinds)}]" if kinds else "list"
+        if isinstance(value, dict):
+            return "map"
+        return "null" if value is None else type(value).__name__
+
+    return {name: shape(value) for name, value in (parameters or {}).items()}
+
+
+def _profile_operators(
+    profile: Dict[str, Any], depth: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Flatten a PROFILE plan into one entry per operator, in plan order."""
+    yield {
+        "operator": profile.get("operatorType"),
+        "depth": depth,
+        "db_hits": profile.get("dbHits", 0),
+        "rows": profile.get("rows", 0),
+        "details": profile.get("args", {}).get("Details"),
+    }
+    for child in profile.get("children", []):
+        yield from _profile_operators(child, depth + 1)
+
+
+def _profile_report(summary: Any) -> Dict[str, Any]:
+    operators = list(_profile_operators(summary.profile or {}))
+    return {
+        "db_hits": sum(operator["db_hits"] for operator in operators),
+        "operators": operators,
+    }
+
+
+def _measure_page(value: Tuple[Any, Any], measure_bytes: bool) -> Tuple[int, Any]:
+    _, results = value
+    return len(results), _estimate_size(results) if measure_bytes else None
+
+
+def _measure_schema(schema: Dict[str, Any], measure_bytes: bool) -> Tuple[int, Any]:
+    rows = len(schema["entities"]) + len(schema["relations"])
+    return rows, _estimate_size(schema) if measure_bytes else None
+
+
+def _finish_event(event: Dict[str, Any], started: float) -> None:
+    event["duration_ms"] = (time.perf_counter() - started) * 1000
+    queries = event["queries"]
+    statements = [statement for query in queries for statement in query["statements"]]
+    for timing in ("connection_acquisition_ms", "conversion_ms"):
+        event[timing] = sum(query[timing] for query in queries)
+    for timing in ("result_available_after_ms", "result_consumed_after_ms"):
+        event[timing] = sum(statement[timing] or 0 for statement in statements)
+
+
+def _annotate_span(span: Any, event: Dict[str, Any]) -> None:
+    """Copy an event's figures onto an OpenTelemetry-style span."""
+    attributes = {
+        "db.system": "neo4j",
+        "db.operation": event["operation"],
+        "db.statement": event["query"],
+        "db.neo4j.rows": event["rows"],
+        "db.neo4j.bytes": event["bytes"],
+        "db.neo4j.queries": len(event["queries"]),
+        "db.neo4j.cached": event["cached"],
+        "db.neo4j.duration_ms": event["duration_ms"],
+        "error.type": event["error"],
+    }
+    attributes.update(
+        {f"db.neo4j.{timing}": event[timing] for timing in _EVENT_TIMINGS}
+    )
+    for name, value in attributes.items():
+        if value is not None:
+            span.set_attribute(name, value)
+
+
+def _instrumented(operation: str, measure: Any, takes_query: bool = False) -> Any:
+    """
+    Decorate a connector method so every call emits an instrumentation event.
+
+    `measure` maps the method's return value to its (rows, bytes), where bytes is None unless
+    the neo4j_instrument_bytes setting is on; `takes_query` records the method's first
+    argument as the event's query.
+    """
+
+    def decorate(method: Any) -> Any:
+        def query_of(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[str]:
+            if not takes_query:
+                return None
+            return kwargs.get("cypher_query", args[0] if args else None)
+
+        if asyncio.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def wrapper(self, *args, **kwargs):
+                with self._instrument(operation, query_of(args, kwargs)) as event:
+                    value = await method(self, *args, **kwargs)
+                    if event is not None:
+                        event["rows"], event["bytes"] = measure(
+                            value, self.settings.instrument_bytes
+                        )
+                    return value
+
+        else:
+
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                with self._instrument(operation, query_of(args, kwargs)) as event:
+                    value = method(self, *args, **kwargs)
+                    if event is not None:
+                        event["rows"], event["bytes"] = measure(
+                            value, self.settings.instrument_bytes
+                        )
+                    return value
+
+        return wrapper
+
+    return decorate
+
+
+# Transaction functions. Every read runs through session.execute_read (and every write
+# through execute_write), so the driver retries transient errors, leader switches and
+# deadlocks with the configured backoff. Results are fully consumed inside the function
+# because a managed transaction may be replayed.
+
+
+def _read_records(
+    tx: Any,
+    cypher_query: str,
+    parameters: Dict[str, Any],
+    serialize: Any = _serialize,
+) -> List[Dict[str, Any]]:
+    return _convert(_convert_records, list(tx.run(cypher_query, parameters)), serialize)
+
+
+def _read_cursor_page(
+    tx: Any,
+    cypher_query: str,
+    parameters: Dict[str, Any],
+    serialize: Any = _serialize,
+) -> Tuple[List[Dict[str, Any]], Any]:
+    """Read a cursor page; the last ordering key is returned as the raw driver value."""
+    records = list(tx.run(cypher_query, parameters))
+    last_key = records[-1].get("__cursor_key") if records else None
+    return _convert(_convert_records, records, serialize), last_key
+
+
+def _read_columns(
+    tx: Any,
+    cypher_query: str,
+    parameters: Dict[str, Any],
+    result_format: str,
+    serialize: Any = _serialize,
+) -> Any:
+    result = tx.run(cypher_query, parameters)
+    if result_format == "pandas":
+        return result.to_df(parse_dates=True)
+    # Values go straight from the record stream into per-column lists.
+    keys = result.keys()
+    columns, appenders = _column_appenders(keys)
+    for record in result:
+        for append, value in zip(appenders, record.values()):
+            append(value)
+    return _convert(_build_columns, keys, columns, result_format, serialize)
+
+
+def _read_values(
+    tx: Any, cypher_query: str, key: str, parameters: Optional[Dict[str, Any]] = None
+) -> List[Any]:
+    return [record[key] for record in tx.run(cypher_query, parameters or {})]
+
+
+def _read_single_value(
+    tx: Any, cypher_query: str, key: str, parameters: Optional[Dict[str, Any]] = None
+) -> Any:
+    return tx.run(cypher_query, parameters or {}).single()[key]
+
+
+def _read_summary(tx: Any, cypher_query: str, parameters: Dict[str, Any]) -> Any:
+    return tx.run(cypher_query, parameters).consume()
+
+
+def _introspect_schema(tx: Any) -> Dict[str, Any]:
+    schema = _new_schema()
+    # Labels and their properties, read from the schema statistics
+    for record in tx.run(_NODE_TYPE_PROPERTIES_QUERY):
+        for label in record["labels"]:
+            _add_entity(schema, label, record["properties"])
+
+    relationship_properties = {
+        _parse_rel_type(record["relType"]): record["properties"]
+        for record in tx.run(_REL_TYPE_PROPERTIES_QUERY)
+    }
+
+    # Source/target mappings come back as virtual relationships
+    visualization = tx.run(_VISUALIZATION_QUERY).single()
+    for relationship in visualization["relationships"]:
+        _add_relation(
+            schema,
+            relationship.type,
+            sorted(relationship.start_node.labels),
+            sorted(relationship.end_node.labels),
+            relationship_properties.get(relationship.type),
+        )
+    return _finalize_schema(schema)
+
+
+def _scan_schema(tx: Any) -> Dict[str, Any]:
+    schema = _new_schema()
+    for record in tx.run(_SCAN_LABELS_QUERY):
+        for label in record["labels"]:
+            _add_entity(schema, label, record["properties"])
+
+    for record in tx.run(_SCAN_RELATIONSHIPS_QUERY):
+        _add_relation(
+            schema,
+            record["relationship"],
+            record["source"],
+            record["target"],
+            [key for keys in record["property_sets"] for key in keys],
+            record["count"],
+        )
+    return _finalize_schema(schema)
+
+
+def _sample_label(
+    tx: Any, label: str, sample_size: Optional[int]
+) -> Tuple[set, int, int]:
+    count_query, sample_query = _label_queries(label, sample_size)
+    total = tx.run(count_query).single()["total"]
+    properties = set()
+    sampled = 0
+    for record in tx.run(sample_query, {"sample_size": sample_size}):
+        properties.update(record["properties"])
+        sampled += record["count"]
+    return properties, sampled, total
+
+
+def _sample_relationship_type(
+    tx: Any, relationship_type: str, sample_size: Optional[int]
+) -> Tuple[List[Dict[str, Any]], int]:
+    count_query, sample_query = _relationship_type_queries(
+        relationship_type, sample_size
+    )
+    total = tx.run(count_query).single()["total"]
+    rows = [
+        record.data() for record in tx.run(sample_query, {"sample_size": sample_size})
+    ]
+    return rows, total
+
+
+async def _async_read_records(
+    tx: Any,
+    cypher_query: str,
+    parameters: Dict[str, Any],
+    serialize: Any = _serialize,
+) -> List[Dict[str, Any]]:
+    result = await tx.run(cypher_query, parameters)
+    return _convert(_convert_records, [record async for record in result], serialize)
+
+
+async def _async_read_cursor_page(
+    tx: Any,
+    cypher_query: str,
+    parameters: Dict[str, Any],
+    serialize: Any = _serialize,
+) -> Tuple[List[Dict[str, Any]], Any]:
+    result = await tx.run(cypher_query, parameters)
+    records = [record async for record in result]
+    last_key = records[-1].get("__cursor_key") if records else None
+    return _convert(_convert_records, records, serialize), last_key
+
+
+async def _async_read_columns(
+    tx: Any,
+    cypher_query: str,
+    parameters: Dict[str, Any],
+    result_format: str,
+    serialize: Any = _serialize,
+) -> Any:
+    result = await tx.run(cypher_query, parameters)
+    if result_format == "pandas":
+        return await result.to_df(parse_dates=True)
+    keys = result.keys()
+    columns, appenders = _column_appenders(keys)
+    async for record in result:
+        for append, value in zip(appenders, record.values()):
+            append(value)
+    return _convert(_build_columns, keys, columns, result_format, serialize)
+
+
+async def _async_read_values(
+    tx: Any, cypher_query: str, key: str, parameters: Optional[Dict[str, Any]] = None
+) -> List[Any]:
+    result = await tx.run(cypher_query, parameters or {})
+    return [record[key] async for record in result]
+
+
+async def _async_read_single_value(
+    tx: Any, cypher_query: str, key: str, parameters: Optional[Dict[str, Any]] = None
+) -> Any:
+    result = await tx.run(cypher_query, parameters or {})
+    return (await result.single())[key]
+
+
+async def _async_read_summary(
+    tx: Any, cypher_query: str, parameters: Dict[str, Any]
+) -> Any:
+    result = await tx.run(cypher_query, parameters)
+    return await result.consume()
+
+
+async def _async_introspect_schema(tx: Any) -> Dict[str, Any]:
+    schema = _new_schema()
+    result = await tx.run(_NODE_TYPE_PROPERTIES_QUERY)
+    async for record in result:
+        for label in record["labels"]:
+            _add_entity(schema, label, record["properties"])
+
+    relationship_properties = {}
+    result = await tx.run(_REL_TYPE_PROPERTIES_QUERY)
+    async for record in result:
+        relationship_properties[_parse_rel_type(record["relType"])] = record[
+            "properties"
+        ]
+
+    result = await tx.run(_VISUALIZATION_QUERY)
+    visualization = await result.single()
+    for relationship in visualization["relationships"]:
+        _add_relation(
+            schema,
+            relationship.type,
+            sorted(relationship.start_node.labels),
+            sorted(relationship.end_node.labels),
+            relationship_properties.get(relationship.type),
+        )
+    return _finalize_schema(schema)
+
+
+async def _async_scan_schema(tx: Any) -> Dict[str, Any]:
+    schema = _new_schema()
+    result = await tx.run(_SCAN_LABELS_QUERY)
+    async for record in result:
+        for label in record["labels"]:
+            _add_entity(schema, label, record["properties"])
+
+    result = await tx.run(_SCAN_RELATIONSHIPS_QUERY)
+    async for record in result:
+        _add_relation(
+            schema,
+            record["relationship"],
+            record["source"],
+            record["target"],
+            [key for keys in record["property_sets"] for key in keys],
+            record["count"],
+        )
+    return _finalize_schema(schema)
+
+
+async def _async_sample_label(
+    tx: Any, label: str, sample_size: Optional[int]
+) -> Tuple[set, int, int]:
+    count_query, sample_query = _label_queries(label, sample_size)
+    result = await tx.run(count_query)
+    total = (await result.single())["total"]
+    properties = set()
+    sampled = 0
+    result = await tx.run(sample_query, {"sample_size": sample_size})
+    async for record in result:
+        properties.update(record["properties"])
+        sampled += record["count"]
+    return properties, sampled, total
+
+
+async def _async_sample_relationship_type(
+    tx: Any, relationship_type: str, sample_size: Optional[int]
+) -> Tuple[List[Dict[str, Any]], int]:
+    count_query, sample_query = _relationship_type_queries(
+        relationship_type, sample_size
+    )
+    result = await tx.run(count_query)
+    total = (await result.single())["total"]
+    result = await tx.run(sample_query, {"sample_size": sample_size})
+    rows = [record.data() async for record in result]
+    return rows, total
+
+
+class _TTLCache(object):
+    """A thread-safe LRU cache whose entries expire `ttl` seconds after being stored."""
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _ResultCache(object):
+    """
+    A thread-safe LRU cache of query results bounded by entry count and estimated bytes.
+
+    Entries expire `ttl` seconds after being stored and are tagged with the labels and
+    relationship types of their query. Invalidating tags drops the matching entries and every
+    untagged one; `generation` lets a read started before an invalidation skip storing its
+    (possibly stale) result.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float, maxsize: int, max_bytes: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+            expires_at, value, _, _ = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, tags: frozenset, generation: int) -> None:
+        size = _estimate_size(value)
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, size, tags)
+            self.bytes += size
+            while len(self._entries) > self.maxsize or self.bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = frozenset(tags)
+        with self._lock:
+            self.generation += 1
+            for key in [
+                key
+                for key, (_, _, _, entry_tags) in self._entries.items()
+                if not entry_tags or entry_tags & tags
+            ]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+
+class _QueryTemplateRegistry(object):
+    """
+    A thread-safe LRU registry of normalized query templates and how often each is reused.
+
+    A call whose template is already registered is counted as a hit: the server has planned
+    that template before, so its plan cache can serve it.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.calls = 0
+        self.hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, template: str, literals: int) -> None:
+        now = time.time()
+        with self._lock:
+            self.calls += 1
+            entry = self._entries.pop(template, None)
+            if entry is None:
+                entry = {"calls": 0, "literals": literals, "first_seen": now}
+            else:
+                self.hits += 1
+            entry["calls"] += 1
+            entry["last_used"] = now
+            self._entries[template] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [
+                dict(entry, template=template)
+                for template, entry in self._entries.items()
+            ]
+            calls, hits = self.calls, self.hits
+        return {
+            "calls": calls,
+            "hits": hits,
+            "hit_ratio": hits / calls if calls else 0.0,
+            "templates": sorted(entries, key=lambda entry: -entry["calls"]),
+        }
+
+
+@dataclass
+class Neo4jSettings(object):
+    """
+    Typed, validated connector settings.
+
+    Every field is read from the `neo4j_<field>` key of the setting dict passed to the connectors;
+    unrelated keys are ignored. Pool, liveness and retry options left as None fall back to the
+    driver defaults; the retry options govern how managed read/write transactions back off
+    before a transient error is surfaced. fetch_size is applied to every session and can be
+    overridden per call.
+    """
+
+    uri: str
+    username: str
+    password: str
+    database: str = "neo4j"
+    max_workers: int = 4
+    share_driver: bool = True
+    total_cache_ttl: float = 0
+    total_cache_size: int = 1024
+    schema_cache_ttl: float = 0
+    # Paginated results are only cached when a TTL is configured.
+    result_cache_ttl: float = 0
+    result_cache_size: int = 1024
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    # Paginated queries slower than the threshold are logged (0 disables); with
+    # slow_query_profile each slow read template is re-run once with PROFILE in the
+    # background, on the same access mode. Write queries are never profiled.
+    slow_query_threshold_ms: float = 0
+    slow_query_log_size: int = 100
+    slow_query_profile: bool = False
+    # Opt-in: report the estimated size of each result in instrumentation events. Record
+    # pages are sized by serializing them to JSON, which costs about as much as the query.
+    instrument_bytes: bool = False
+    # Opt-in: lift literals out of read queries into parameters so variants share a plan.
+    normalize_queries: bool = False
+    query_template_registry_size: int = 1024
+    # Driver (connection pool) configuration
+    max_connection_pool_size: Optional[int] = None
+    connection_acquisition_timeout: Optional[float] = None
+    connection_timeout: Optional[float] = None
+    max_connection_lifetime: Optional[float] = None
+    liveness_check_timeout: Optional[float] = None
+    keep_alive: Optional[bool] = None
+    # Managed transaction retries (exponential backoff with jitter)
+    max_transaction_retry_time: Optional[float] = None
+    initial_retry_delay: Optional[float] = None
+    retry_delay_multiplier: Optional[float] = None
+    retry_delay_jitter_factor: Optional[float] = None
+    # "connector" chains every session of a connector with one bookmark manager so reads
+    # routed to replicas observe the connector's earlier writes; "none" only does so inside
+    # causal_context() blocks.
+    causal_consistency: str = "connector"
+    # Session configuration
+    fetch_size: Optional[int] = None
+    # "properties" returns nodes, relationships and paths in the Record.data() shape;
+    # "entities" returns dicts with element ids, labels/type and endpoints.
+    entity_format: str = "properties"
+
+    _DRIVER_CONFIG = (
+        "max_connection_pool_size",
+        "connection_acquisition_timeout",
+        "connection_timeout",
+        "max_connection_lifetime",
+        "liveness_check_timeout",
+        "keep_alive",
+        "max_transaction_retry_time",
+        "initial_retry_delay",
+        "retry_delay_multiplier",
+        "retry_delay_jitter_factor",
+    )
+
+    def __post_init__(self) -> None:
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is None:
+                if field.default is not None:
+                    raise ValueError(f"neo4j_{field.name} is required.")
+                continue
+            kind = field.type
+            if get_origin(kind) is Union:
+                kind = get_args(kind)[0]
+            try:
+                if kind is bool:
+                    value = _to_bool(value)
+                elif kind is int:
+                    value = _to_int(value)
+                else:
+                    value = kind(value)
+            except (TypeError, ValueError):
+                raise ValueError(
+                    f"neo4j_{field.name} must be of type {kind.__name__}, got {value!r}."
+                )
+            if kind in (int, float) and value < 0 and field.name != "fetch_size":
+                raise ValueError(f"neo4j_{field.name} must not be negative.")
+            setattr(self, field.name, value)
+
+        if self.causal_consistency not in ("connector", "none"):
+            raise ValueError('neo4j_causal_consistency must be "connector" or "none".')
+        if self.entity_format not in ("properties", "entities"):
+            raise ValueError('neo4j_entity_format must be "properties" or "entities".')
+        if self.max_workers < 1:
+            raise ValueError("neo4j_max_workers must be at least 1.")
+        if self.fetch_size is not None and (
+            self.fetch_size == 0 or self.fetch_size < -1
+        ):
+            raise ValueError("neo4j_fetch_size must be positive, or -1 to fetch all.")
+
+    @classmethod
+    def from_setting(cls, setting: Dict[str, Any]) -> "Neo4jSettings":
+        for field in fields(cls):
+            if field.default is MISSING and f"neo4j_{field.name}" not in setting:
+                raise ValueError(f"neo4j_{field.name} is required.")
+        return cls(
+            **{
+                field.name: setting[f"neo4j_{field.name}"]
+                for field in fields(cls)
+                if f"neo4j_{field.name}" in setting
+            }
+        )
+
+    def driver_config(self) -> Dict[str, Any]:
+        """Keyword arguments forwarded to GraphDatabase.driver/AsyncGraphDatabase.driver."""
+        return {
+            name: getattr(self, name)
+            for name in self._DRIVER_CONFIG
+            if getattr(self, name) is not None
+        }
+
+    def session_config(
+        self, fetch_size: Optional[int] = None, access_mode: str = READ_ACCESS
+    ) -> Dict[str, Any]:
+        """Keyword arguments forwarded to driver.session, with an optional fetch_size override."""
+        config = {"database": self.database, "default_access_mode": access_mode}
+        fetch_size = fetch_size if fetch_size is not None else self.fetch_size
+        if fetch_size is not None:
+            config["fetch_size"] = fetch_size
+        return config
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        if value.strip().lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.strip().lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(value)
+    return bool(value)
+
+
+def _to_int(value: Any) -> int:
+    """Convert to int without truncating: 3.0 and "3" are accepted, 3.7 and True are not."""
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    converted = int(value)
+    if converted != value:
+        raise ValueError(value)
+    return converted
+
+
+class _DriverRegistry(object):
+    """
+    Process-wide, reference-counted registry of drivers.
+
+    Connectors built with the same uri, credentials, database and pool settings share one
+    driver and therefore one warm connection pool; the driver is only closed once the last
+    connector using it has been closed. Async drivers are bound to the event loop that
+    created them, so they are only shared between connectors on the same loop.
+    """
+
+    def __init__(self) -> None:
+        self._drivers = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, factory: Any) -> Any:
+        with self._lock:
+            entry = self._drivers.get(key)
+            if entry is None:
+                entry = self._drivers[key] = [factory(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key: Hashable) -> bool:
+        """Drop one reference; True when it was the last one and the driver should be closed."""
+        with self._lock:
+            entry = self._drivers.get(key)
+            if entry is None:
+                return False
+            entry[1] -= 1
+            if entry[1] > 0:
+                return False
+            del self._drivers[key]
+            return True
+
+
+_driver_registry = _DriverRegistry()
+
+# Bookmark managers scoped to the current logical request by causal_context(), keyed by
+# connector. Context variables must live at module level (contexts hold strong references
+# to them), so one variable serves every connector; the mapping is replaced, never mutated.
+_REQUEST_BOOKMARK_MANAGERS = contextvars.ContextVar(
+    "neo4j_request_bookmark_managers", default=None
+)
+
+
+class _BaseNeo4jConnector(object):
+    """Settings, caches and cache bookkeeping shared by the sync and async connectors."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        settings: Optional[Neo4jSettings] = None,
+        instrumentation_hooks: Optional[List[Any]] = None,
+        tracer: Any = None,
+        **setting: Dict[str, Any],
+    ) -> None:
         self.logger = logger
-        self.driver = GraphDatabase.driver(
-            setting["neo4j_uri"],
-            auth=(setting["neo4j_username"], setting["neo4j_password"]),
+        self.settings = settings or Neo4jSettings.from_setting(setting)
+        # Callables receiving one event dict per instrumented call, and/or an OpenTelemetry
+        # tracer (anything with start_as_current_span) that gets one span per call.
+        self.instrumentation_hooks = list(instrumentation_hooks or [])
+        self.tracer = tracer
+        self.database = self.settings.database
+        self._serialize = (
+            _serialize_entities
+            if self.settings.entity_format == "entities"
+            else _serialize
+        )
+        self.max_workers = self.settings.max_workers
+        # Totals are only cached when a TTL is configured.
+        self.total_cache = (
+            _TTLCache(self.settings.total_cache_ttl, self.settings.total_cache_size)
+            if self.settings.total_cache_ttl > 0
+            else None
+        )
+
+        # Pages are only cached when a TTL is configured; connector-side writes invalidate them.
+        self.result_cache = (
+            _ResultCache(
+                self.settings.result_cache_ttl,
+                self.settings.result_cache_size,
+                self.settings.result_cache_max_bytes,
+            )
+            if self.settings.result_cache_ttl > 0
+            else None
+        )
+
+        # Most recent slow paginated queries, and the templates already profiled.
+        self.slow_queries = (
+            deque(maxlen=self.settings.slow_query_log_size)
+            if self.settings.slow_query_threshold_ms > 0
+            else None
+        )
+        # Bounded like the template registry; a template leaving it may be profiled again.
+        self._profiled_templates = OrderedDict()
+        self._profiled_templates_lock = threading.Lock()
+
+        # Normalized query templates and their reuse, when literal lifting is enabled.
+        self.query_templates = (
+            _QueryTemplateRegistry(self.settings.query_template_registry_size)
+            if self.settings.normalize_queries
+            else None
+        )
+
+        # Schemas are only cached when a TTL is configured; stale entries are still served
+        # while a background refresh is in flight (stale-while-revalidate).
+        self.schema_cache_ttl = self.settings.schema_cache_ttl
+        self._schema_cache = {}
+        self._schema_refreshing = set()
+        self._schema_cache_lock = threading.Lock()
+
+    def _open_driver(self, graph_database: Any) -> Any:
+        """Return a driver from the shared registry (or a private one if sharing is disabled)."""
+        self._graph_database = graph_database
+        self.bookmark_manager = (
+            graph_database.bookmark_manager()
+            if self.settings.causal_consistency == "connector"
+            else None
+        )
+        uri = self.settings.uri
+        auth = (self.settings.username, self.settings.password)
+        driver_config = self.settings.driver_config()
+        self._driver_key = None
+        loop = None
+        if graph_database is AsyncGraphDatabase:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+        if not self.settings.share_driver or (
+            graph_database is AsyncGraphDatabase and loop is None
+        ):
+            # Without a running loop there is nothing to scope an async driver to.
+            return graph_database.driver(uri, auth=auth, **driver_config)
+
+        # Drivers are not fork-safe, so the pid is part of the key; async drivers cannot
+        # cross event loops, so theirs also holds the loop.
+        self._driver_key = (
+            graph_database.__name__,
+            os.getpid(),
+            loop,
+            uri,
+            auth[0],
+            hashlib.sha256(auth[1].encode("utf-8")).hexdigest(),
+            self.database,
+            tuple(sorted(driver_config.items())),
+        )
+        return _driver_registry.acquire(
+            self._driver_key,
+            lambda: graph_database.driver(uri, auth=auth, **driver_config),
+        )
+
+    def _release_driver(self) -> bool:
+        """Release this connector's driver; True when the caller should close it."""
+        if self._driver_key is None:
+            return True
+        driver_key, self._driver_key = self._driver_key, None
+        return _driver_registry.release(driver_key)
+
+    def _session_config(
+        self, fetch_size: Optional[int] = None, use_writer: bool = False
+    ) -> Dict[str, Any]:
+        config = self.settings.session_config(
+            fetch_size, WRITE_ACCESS if use_writer else READ_ACCESS
+        )
+        request_bookmark_managers = _REQUEST_BOOKMARK_MANAGERS.get() or {}
+        bookmark_manager = request_bookmark_managers.get(self) or self.bookmark_manager
+        if bookmark_manager is not None:
+            config["bookmark_manager"] = bookmark_manager
+        return config
+
+    @contextlib.contextmanager
+    def causal_context(self) -> Iterator[Any]:
+        """
+        Scope a fresh bookmark manager to one logical request.
+
+        Sessions opened by this connector inside the block (in the current thread or asyncio
+        task, and in the worker threads it fans out to) are chained by their own bookmarks
+        instead of the connector-wide ones: a read issued after a write in the same block sees
+        that write even when routed to a replica, without waiting on unrelated requests' writes.
+
+        :return: The bookmark manager used inside the block
+        """
+        bookmark_manager = self._graph_database.bookmark_manager()
+        token = _REQUEST_BOOKMARK_MANAGERS.set(
+            {**(_REQUEST_BOOKMARK_MANAGERS.get() or {}), self: bookmark_manager}
+        )
+        try:
+            yield bookmark_manager
+        finally:
+            _REQUEST_BOOKMARK_MANAGERS.reset(token)
+
+    @property
+    def driver(self):
+        return self._driver
+
+    @driver.setter
+    def driver(self, driver: object) -> object:
+        self._driver = driver
+
+    def invalidate_schema_cache(self) -> None:
+        """Drop all cached schemas so the next get_graph_schema call rediscovers them."""
+        with self._schema_cache_lock:
+            self._schema_cache.clear()
+
+    def invalidate_total_cache(self) -> None:
+        """Drop all cached totals, e.g. after the underlying data has changed."""
+        if self.total_cache is not None:
+            self.total_cache.clear()
+
+    def invalidate_result_cache(self, tags: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop cached query results, e.g. after writes made outside this connector.
+
+        :param tags: Labels or relationship types that changed; only results of queries that
+            mention one of them (or no label at all) are dropped. All results are dropped when
+            omitted.
+        """
+        if self.result_cache is None:
+            return
+        if tags is None:
+            self.result_cache.clear()
+        else:
+            self.result_cache.invalidate(tags)
+
+    def _result_cache_key(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]],
+        skip: int,
+        limit: int,
+        result_format: str,
+        use_cache: bool,
+    ) -> Tuple[Optional[Tuple[Any, ...]], Optional[int]]:
+        """Return the page's cache key and the cache generation, or (None, None) if uncached."""
+        if self.result_cache is None or not use_cache:
+            return None, None
+        return (
+            (result_format, skip, limit) + _query_cache_key(cypher_query, parameters),
+            self.result_cache.generation,
+        )
+
+    def _get_cached_result(self, cache_key: Optional[Tuple[Any, ...]]) -> Any:
+        if cache_key is None:
+            return None
+        result = self.result_cache.get(cache_key)
+        if result is None:
+            return None
+        event = _QUERY_EVENT.get()
+        if event is not None:
+            event["cached"] = True
+        return _copy_result(result)
+
+    def _store_result(
+        self,
+        cache_key: Optional[Tuple[Any, ...]],
+        generation: Optional[int],
+        result: Any,
+        cypher_query: str,
+        cache_tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        if cache_key is None:
+            return
+        tags = _query_tags(cypher_query)
+        if tags and cache_tags:
+            tags = tags | frozenset(cache_tags)
+        self.result_cache.set(cache_key, _copy_result(result), tags, generation)
+
+    def add_instrumentation_hook(self, hook: Any) -> None:
+        """
+        Register a callable that receives one event dict per get_graph_schema and
+        execute_cypher_query_with_pagination call.
+
+        The event has the operation, query, rows, estimated bytes (None unless
+        neo4j_instrument_bytes is on), whether the page came from the result cache, the error (if
+        any), the call's duration_ms and the summed connection_acquisition_ms,
+        result_available_after_ms, result_consumed_after_ms (server side) and conversion_ms
+        (client side); "queries" breaks these down per transaction attempt and statement,
+        including the concurrent count and schema fan-out queries.
+        """
+        self.instrumentation_hooks.append(hook)
+
+    @contextlib.contextmanager
+    def _instrument(
+        self, operation: str, cypher_query: Optional[str] = None
+    ) -> Iterator[Optional[Dict[str, Any]]]:
+        if (
+            not self.instrumentation_hooks
+            and self.tracer is None
+            and self.slow_queries is None
+        ):
+            yield None
+            return
+
+        event = {
+            "operation": operation,
+            "query": cypher_query,
+            "started_at": time.time(),
+            "rows": None,
+            "bytes": None,
+            "cached": False,
+            "error": None,
+            "queries": [],
+        }
+        token = _QUERY_EVENT.set(event)
+        summaries = []
+        summaries_token = _QUERY_SUMMARIES.set(summaries)
+        started = time.perf_counter()
+        try:
+            with (
+                self.tracer.start_as_current_span(f"neo4j.{operation}")
+                if self.tracer is not None
+                else contextlib.nullcontext()
+            ) as span:
+                try:
+                    yield event
+                except Exception as e:
+                    event["error"] = type(e).__name__
+                    raise
+                finally:
+                    _finish_event(event, started)
+                    if span is not None:
+                        _annotate_span(span, event)
+        finally:
+            _QUERY_EVENT.reset(token)
+            _QUERY_SUMMARIES.reset(summaries_token)
+            if (
+                self.slow_queries is not None
+                and operation == "execute_cypher_query_with_pagination"
+                and not event["cached"]
+                and event["duration_ms"] >= self.settings.slow_query_threshold_ms
+            ):
+                try:
+                    self._record_slow_query(event, summaries)
+                except Exception:
+                    self.logger.warning(traceback.format_exc())
+            for hook in self.instrumentation_hooks:
+                try:
+                    hook(event)
+                except Exception:
+                    # A failing hook must not fail the query it observes.
+                    self.logger.warning(traceback.format_exc())
+
+    def get_slow_queries(self) -> List[Dict[str, Any]]:
+        """
+        Return the logged slow paginated queries, oldest first.
+
+        Every entry has the normalized query, the parameter shapes (types, never values), the
+        timings, rows and bytes of the call, and the page statement's summary counters. With
+        `neo4j_slow_query_profile`, the first entry of each template also gets a "profile" with
+        the total and per-operator db hits once its background PROFILE run completes (or an
+        "error" if it failed).
+        """
+        if self.slow_queries is None:
+            return []
+        return list(self.slow_queries)
+
+    def _record_slow_query(
+        self, event: Dict[str, Any], summaries: List[Tuple[str, Any, bool]]
+    ) -> None:
+        page, use_writer = next(
+            (
+                (summary, use_writer)
+                for work, summary, use_writer in summaries
+                if work in _PAGE_READS
+            ),
+            (None, False),
+        )
+        template = _normalize_cypher(event["query"])[0]
+        entry = {
+            "logged_at": time.time(),
+            "query": template,
+            "parameter_shapes": _parameter_shapes(
+                page.parameters if page is not None else None
+            ),
+            "query_type": page.query_type if page is not None else None,
+            "counters": (
+                {name: getattr(page.counters, name) for name in _WRITE_COUNTERS}
+                if page is not None
+                else None
+            ),
+            "profile": None,
+        }
+        entry.update(
+            {
+                key: event[key]
+                for key in ("duration_ms", "rows", "bytes", "error") + _EVENT_TIMINGS
+            }
+        )
+        self.slow_queries.append(entry)
+        self.logger.warning(
+            f"Slow query ({event['duration_ms']:.0f} ms, {event['rows']} rows): {template}"
+        )
+
+        if not self.settings.slow_query_profile or page is None:
+            return
+        cypher_query = getattr(page.query, "text", page.query)
+        # PROFILE executes the query, so a write would be applied a second time.
+        if page.query_type not in (None, "r") or _is_write_query(cypher_query):
+            return
+        if self._claim_profile(template):
+            self._profile_in_background(
+                entry, cypher_query, dict(page.parameters or {}), use_writer
+            )
+
+    def _claim_profile(self, template: str) -> bool:
+        """Mark a template as profiled; False if it already was."""
+        with self._profiled_templates_lock:
+            if template in self._profiled_templates:
+                self._profiled_templates.move_to_end(template)
+                return False
+            self._profiled_templates[template] = None
+            if (
+                len(self._profiled_templates)
+                > self.settings.query_template_registry_size
+            ):
+                self._profiled_templates.popitem(last=False)
+            return True
+
+    def get_query_template_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the normalized query templates seen by this connector and how often each was
+        reused, or None unless `neo4j_normalize_queries` is enabled.
+
+        :return: The total calls, the calls that reused a known template (hits), the hit ratio and
+            every registered template with its call count, lifted literal count and timestamps
+        """
+        if self.query_templates is None:
+            return None
+        return self.query_templates.stats()
+
+    def _prepare_query(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]],
+        write: bool = False,
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Swap a read query for its normalized template when literal lifting is enabled."""
+        if self.query_templates is None or write or _is_write_query(cypher_query):
+            return cypher_query, parameters
+        template, literals = _normalize_cypher(cypher_query)
+        names = [f"__lit{index}" for index in range(len(literals))]
+        if parameters and any(name in parameters for name in names):
+            return cypher_query, parameters
+        self.query_templates.record(template, len(literals))
+        return template, {**(parameters or {}), **dict(zip(names, literals))}
+
+    def _invalidate_after_write(self, cypher_query: str) -> None:
+        """Drop the totals and cached pages a write issued through a query API may have changed."""
+        self.invalidate_total_cache()
+        # Without labels to go by (e.g. unlabeled patterns), every cached page is suspect.
+        self.invalidate_result_cache(_query_tags(cypher_query) or None)
+
+    def _get_cached_schema(
+        self, cache_key: Tuple[str, int]
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return the cached schema (or None) and whether it is due for a refresh."""
+        with self._schema_cache_lock:
+            entry = self._schema_cache.get(cache_key)
+        if entry is None:
+            return None, False
+        fetched_at, schema = entry
+        return (
+            copy.deepcopy(schema),
+            time.monotonic() - fetched_at > self.schema_cache_ttl,
+        )
+
+    def _store_schema(self, cache_key: Tuple[str, int], schema: Dict[str, Any]) -> None:
+        with self._schema_cache_lock:
+            self._schema_cache[cache_key] = (time.monotonic(), schema)
+
+    def _claim_schema_refresh(self, cache_key: Tuple[str, int]) -> bool:
+        """Mark a refresh for `cache_key` as in flight; False if one already is."""
+        with self._schema_cache_lock:
+            if cache_key in self._schema_refreshing:
+                return False
+            self._schema_refreshing.add(cache_key)
+            return True
+
+    def _release_schema_refresh(self, cache_key: Tuple[str, int]) -> None:
+        with self._schema_cache_lock:
+            self._schema_refreshing.discard(cache_key)
+
+    def _get_cached_total(self, cache_key: Tuple[str, ...]) -> Optional[int]:
+        if self.total_cache is None:
+            return None
+        return self.total_cache.get(cache_key)
+
+    def _store_total(self, cache_key: Tuple[str, ...], total: int) -> None:
+        if self.total_cache is not None:
+            self.total_cache.set(cache_key, total)
+
+
+class Neo4jConnector(_BaseNeo4jConnector):
+    def __init__(
+        self,
+        logger: logging.Logger,
+        settings: Optional[Neo4jSettings] = None,
+        instrumentation_hooks: Optional[List[Any]] = None,
+        tracer: Any = None,
+        **setting: Dict[str, Any],
+    ) -> None:
+        super(Neo4jConnector, self).__init__(
+            logger, settings, instrumentation_hooks, tracer, **setting
         )
-        self.database = setting.get("neo4j_database", "neo4j")
+        self.driver = self._open_driver(GraphDatabase)
+        self._executor = None
+        self._background_executor = None
+        self._executor_lock = threading.Lock()
 
     def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._background_executor:
+            self._background_executor.shutdown(wait=True)
+            self._background_executor = None
         if self.driver:
-            self.driver.close()
+            if self._release_driver():
+                self.driver.close()
+            self.driver = None
 
     @property
-    def driver(self):
-        return self._driver
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker pool used to run independent queries on separate pooled sessions."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="neo4j-connector",
+                )
+            return self._executor
 
-    @driver.setter
-    def driver(self, driver: object) -> object:
-        self._driver = driver
+    @property
+    def background_executor(self) -> ThreadPoolExecutor:
+        """
+        Single worker for background schema refreshes and PROFILE runs.
 
-    def get_graph_schema(self) -> Dict[str, Any]:
+        It is separate from `executor` so background work never queues ahead of the totals
+        that paginated calls are waiting for.
+        """
+        with self._executor_lock:
+            if self._background_executor is None:
+                self._background_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="neo4j-background"
+                )
+            return self._background_executor
+
+    @_instrumented("get_graph_schema", _measure_schema)
+    def get_graph_schema(
+        self,
+        strategy: str = "introspection",
+        sample_size: int = 100,
+        use_cache: bool = True,
+        concurrency: int = 1,
+    ) -> Dict[str, Any]:
         """
         Generates the schema in the specified format, including:
         - Entities with attributes and relations
-        - Relations with source and target
-        :param database: The name of the database to query
-        :return: A dictionary representing the schema
+        - Relations with source, target, attributes and every (source, target) endpoint pair
+        :param strategy: "introspection" (default) reads the schema from the db.schema.* procedures
+            and falls back to sampling if they are unavailable; "sampling" samples up to `sample_size`
+            nodes per label and relationships per type; "exact" scans every node and relationship
+        :param sample_size: The number of nodes/relationships sampled per label/type (default is 100)
+        :param use_cache: Whether to serve the schema from the connector's schema cache when
+            `neo4j_schema_cache_ttl` is configured (default is True)
+        :param concurrency: The number of sessions used to discover labels and relationship types
+            in parallel for the "sampling" and "exact" strategies (default is 1)
+        :return: A dictionary representing the schema; the sampling strategy adds a "coverage" entry
+            with the sampled and total counts per label and relationship type
         """
-        schema = {"entities": {}, "relations": {}}
         try:
-            with self.driver.session(database=self.database) as session:
-                # Get all labels and their properties
-                labels_query = """
-                    MATCH (n)
-                    RETURN DISTINCT labels(n) AS labels, keys(n) AS properties
-                """
-                label_results = session.run(labels_query)
-                for record in label_results:
-                    labels = record["labels"]
-                    properties = record["properties"]
-                    for label in labels:
-                        if label not in schema["entities"]:
-                            schema["entities"][label] = {
-                                "attributes": [],
-                                "relations": [],
-                            }
-                        schema["entities"][label]["attributes"] = list(
-                            set(schema["entities"][label]["attributes"])
-                            | set(properties)
-                        )
+            if self.schema_cache_ttl <= 0 or not use_cache:
+                return self._discover_graph_schema(strategy, sample_size, concurrency)
 
-                # Get all relationship types and their source/target mappings
-                relationships_query = """
-                    MATCH (a)-[r]->(b)
-                    RETURN DISTINCT type(r) AS relationship, labels(a) AS source, labels(b) AS target
-                """
-                relationship_results = session.run(relationships_query)
-                for record in relationship_results:
-                    relationship = record["relationship"]
-                    source_labels = record["source"]
-                    target_labels = record["target"]
-
-                    # Add relationship details
-                    schema["relations"][relationship] = {
-                        "source": source_labels[0] if source_labels else None,
-                        "target": target_labels[0] if target_labels else None,
-                    }
-
-                    # Update relations for source entity
-                    if source_labels:
-                        for source in source_labels:
-                            if source in schema["entities"]:
-                                schema["entities"][source]["relations"].append(
-                                    relationship
-                                )
-
-            # Deduplicate relations for entities
-            for entity in schema["entities"]:
-                schema["entities"][entity]["relations"] = list(
-                    set(schema["entities"][entity]["relations"])
-                )
+            cache_key = (strategy, sample_size)
+            schema, stale = self._get_cached_schema(cache_key)
+            if schema is None:
+                schema = self._discover_graph_schema(strategy, sample_size, concurrency)
+                self._store_schema(cache_key, schema)
+                return copy.deepcopy(schema)
 
+            if stale:
+                self._refresh_schema_in_background(cache_key, concurrency)
             return schema
         except Exception as e:
             log = traceback.format_exc()
             self.logger.error(log)
             raise e
 
+    def _refresh_schema_in_background(
+        self, cache_key: Tuple[str, int], concurrency: int
+    ) -> None:
+        if not self._claim_schema_refresh(cache_key):
+            return
+
+        def refresh():
+            try:
+                schema = self._discover_graph_schema(*cache_key, concurrency)
+                self._store_schema(cache_key, schema)
+            except Exception:
+                self.logger.error(traceback.format_exc())
+            finally:
+                self._release_schema_refresh(cache_key)
+
+        self.background_executor.submit(contextvars.Context().run, refresh)
+
+    def _profile_in_background(
+        self,
+        entry: Dict[str, Any],
+        cypher_query: str,
+        parameters: Dict[str, Any],
+        use_writer: bool = False,
+    ) -> None:
+        def profile():
+            try:
+                entry["profile"] = _profile_report(
+                    self._execute_read(
+                        _read_summary,
+                        f"PROFILE {cypher_query}",
+                        parameters,
+                        use_writer=use_writer,
+                    )
+                )
+            except Exception as e:
+                entry["profile"] = {"error": repr(e)}
+                self.logger.error(traceback.format_exc())
+
+        self.background_executor.submit(contextvars.Context().run, profile)
+
+    def _discover_graph_schema(
+        self, strategy: str, sample_size: int, concurrency: int = 1
+    ) -> Dict[str, Any]:
+        if strategy == "exact":
+            if concurrency > 1:
+                return self._get_graph_schema_by_label(None, concurrency)
+            return self._get_graph_schema_by_scan()
+        if strategy == "sampling":
+            return self._get_graph_schema_by_label(sample_size, concurrency)
+        if strategy != "introspection":
+            raise ValueError(f"Unknown schema strategy: {strategy}")
+
+        try:
+            return self._get_graph_schema_by_introspection()
+        except Exception:
+            self.logger.warning(
+                "Schema introspection procedures failed, falling back to sampling."
+            )
+            return self._get_graph_schema_by_label(sample_size, concurrency)
+
+    def _get_graph_schema_by_introspection(self) -> Dict[str, Any]:
+        return self._execute_read(_introspect_schema)
+
+    def _get_graph_schema_by_label(
+        self, sample_size: Optional[int], concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Discovers the schema one label and one relationship type at a time.
+
+        With a `sample_size`, at most that many nodes/relationships are read per label/type and
+        coverage statistics are reported; without one, every node and relationship is read.
+        With `concurrency` above 1 the per-label and per-type queries are fanned out across a
+        dedicated pool of that many sessions.
+        """
+        labels = self._execute_read(_read_values, _LABELS_QUERY, "label")
+        relationship_types = self._execute_read(
+            _read_values, _RELATIONSHIP_TYPES_QUERY, "relationshipType"
+        )
+
+        if concurrency > 1:
+            # A dedicated pool keeps this from deadlocking when it already runs
+            # on a connector executor (e.g. a background schema refresh).
+            with ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix="neo4j-schema"
+            ) as pool:
+                label_futures = [
+                    _submit_in_context(
+                        pool, self._execute_read, _sample_label, label, sample_size
+                    )
+                    for label in labels
+                ]
+                relationship_futures = [
+                    _submit_in_context(
+                        pool,
+                        self._execute_read,
+                        _sample_relationship_type,
+                        relationship_type,
+                        sample_size,
+                    )
+                    for relationship_type in relationship_types
+                ]
+                label_results = [future.result() for future in label_futures]
+                relationship_results = [
+                    future.result() for future in relationship_futures
+                ]
+        else:
+            with self.driver.session(**self._session_config()) as session:
+                label_results = [
+                    session.execute_read(_sample_label, label, sample_size)
+                    for label in labels
+                ]
+                relationship_results = [
+                    session.execute_read(
+                        _sample_relationship_type, relationship_type, sample_size
+                    )
+                    for relationship_type in relationship_types
+                ]
+
+        return _assemble_schema_by_label(
+            labels,
+            label_results,
+            relationship_types,
+            relationship_results,
+            sample_size,
+        )
+
+    def _execute_read(
+        self,
+        work: Any,
+        *args: Any,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+        auto_commit: bool = False,
+    ) -> Any:
+        """
+        Run `work` as a managed read transaction on a fresh read-access session, which the
+        routing driver sends to a follower or read replica; `use_writer` pins it to the leader.
+        With `auto_commit` (for CALL { ... } IN TRANSACTIONS) it runs straight on the session
+        as auto-commit queries, without retries.
+        """
+        work = _traced(work, use_writer)
+        with self.driver.session(
+            **self._session_config(fetch_size, use_writer)
+        ) as session:
+            if auto_commit:
+                return work(session, *args)
+            if use_writer:
+                return session.execute_write(work, *args)
+            return session.execute_read(work, *args)
+
+    def _get_graph_schema_by_scan(self) -> Dict[str, Any]:
+        return self._execute_read(_scan_schema)
+
+    @_instrumented(
+        "execute_cypher_query_with_pagination", _measure_page, takes_query=True
+    )
     def execute_cypher_query_with_pagination(
         self,
         cypher_query: str,
         parameters: Optional[Dict[str, Any]] = None,
         limit: int = 100,
         skip: int = 0,
-        get_total: bool = False,
-    ) -> Tuple[int, List[Dict[str, Any]]]:
+        get_total: Union[bool, str] = False,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+        result_format: str = "records",
+        use_cache: bool = True,
+        cache_tags: Optional[Iterable[str]] = None,
+        write: bool = False,
+    ) -> Tuple[int, Any]:
         """
         Executes a Cypher query with pagination on the specified database and optionally returns the total number of results.
 
@@ -117,53 +2921,775 @@ class Neo4jConnector(object):
         :param database: The name of the database to query (default is "neo4j")
         :param limit: The maximum number of records to fetch per page (default is 100)
         :param skip: The number of records to skip (default is 0)
-        :param get_total: Whether to retrieve the total number of results (default is False)
+        :param get_total: Whether to retrieve the total number of results (default is False);
+            pass "estimated" to use the planner's row estimate instead of counting the full result,
+            or "capped:N" to stop counting after N rows and get {"total": <at most N>, "capped":
+            <whether more than N rows matched>} back, e.g. to show "10000+"
+        :param fetch_size: Overrides the neo4j_fetch_size setting for this call (optional)
+        :param use_writer: Read from the cluster leader instead of a follower/read replica, e.g. to
+            read your own writes (default is False)
+        :param result_format: "records" for a list of dicts (default), or build the page straight
+            into columns: "arrow" (pyarrow Table), "numpy" (structured array) or "pandas" (DataFrame)
+        :param use_cache: Whether to serve the page from the connector's result cache when
+            `neo4j_result_cache_ttl` is configured (default is True)
+        :param cache_tags: Extra labels the cached page is invalidated by, on top of the labels and
+            relationship types found in the query (optional)
+        :param write: Run the query in a write transaction on the leader. Queries with a write clause
+            (CREATE, MERGE, SET, DELETE, REMOVE, FOREACH) are detected automatically; pass True for
+            writes the tokenizer cannot see, e.g. writing procedures. Write pages are never cached,
+            invalidate the cached totals and pages of the labels they touch and cannot be combined
+            with get_total (default is False)
         :return: A dictionary containing the paginated results and total count (if requested)
         """
         try:
-            results = []
-            total = None
-
-            if get_total:
-                # Modify the query to get the total count
-                count_query = (
-                    "CALL (*) { " f"{cypher_query} " "} RETURN count(*) as total"
-                )
-                with self.driver.session(database=self.database) as session:
-                    total_result = session.run(count_query, parameters or {})
-                    total = total_result.single()["total"]
-
-            _parameters = parameters or {}
-            # Add pagination clauses to the query
-            if "LIMIT" in cypher_query.upper() or "SKIP" in cypher_query.upper():
-                _cypher_query = cypher_query
+            _check_result_format(result_format)
+            cypher_query, parameters = self._prepare_query(
+                cypher_query, parameters, write
+            )
+            # Writes run in write transactions on the leader and bypass the result cache.
+            write = write or _is_write_query(cypher_query)
+            use_writer = use_writer or write
+            if write and get_total:
+                # The count wraps the query, so it would apply the write a second time.
+                raise ValueError("get_total is not supported for write queries.")
+            # The count runs on its own pooled session while the page is fetched,
+            # so the latency is the max of the two round-trips rather than the sum.
+            total_future = (
+                _submit_in_context(
+                    self.executor,
+                    self._fetch_total,
+                    cypher_query,
+                    parameters,
+                    _total_mode(get_total),
+                    use_writer,
+                )
+                if get_total
+                else None
+            )
+
+            _cypher_query, _parameters = _build_page_query(
+                cypher_query, parameters, skip, limit
+            )
+            cache_key, generation = self._result_cache_key(
+                cypher_query,
+                parameters,
+                skip,
+                limit,
+                result_format,
+                use_cache and not write,
+            )
+            # Reads pinned to the writer want fresh data, so they skip the cached page.
+            results = None if use_writer else self._get_cached_result(cache_key)
+            if results is None:
+                results = self._execute_read(
+                    *(
+                        (_read_records, _cypher_query, _parameters, self._serialize)
+                        if result_format == "records"
+                        else (
+                            _read_columns,
+                            _cypher_query,
+                            _parameters,
+                            result_format,
+                            self._serialize,
+                        )
+                    ),
+                    fetch_size=fetch_size,
+                    use_writer=use_writer,
+                    auto_commit=_runs_in_transactions(_cypher_query),
+                )
+                if write:
+                    self._invalidate_after_write(cypher_query)
+                self._store_result(
+                    cache_key, generation, results, cypher_query, cache_tags
+                )
+
+            total = total_future.result() if total_future else None
+            return total, results
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
+
+    def _fetch_total(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        mode: str = "exact",
+        use_writer: bool = False,
+    ) -> Union[int, Dict[str, Any]]:
+        cache_key = (mode,) + _query_cache_key(cypher_query, parameters)
+        # Reads pinned to the writer want fresh data, so they skip the cached total.
+        total = None if use_writer else self._get_cached_total(cache_key)
+        if total is not None:
+            return _report_total(total, mode)
+
+        if mode == "estimated":
+            total = _estimated_rows(
+                self._execute_read(
+                    _read_summary,
+                    f"EXPLAIN {cypher_query}",
+                    parameters or {},
+                    use_writer=use_writer,
+                )
+            )
+        else:
+            cap = _total_cap(mode)
+            total = self._execute_read(
+                _read_single_value,
+                _build_count_query(cypher_query, cap),
+                "total",
+                parameters if cap is None else {**(parameters or {}), "__cap": cap + 1},
+                use_writer=use_writer,
+            )
+
+        self._store_total(cache_key, total)
+        return _report_total(total, mode)
+
+    def execute_cypher_query_with_cursor(
+        self,
+        cypher_query: str,
+        cursor_key: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+    ) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        Executes a Cypher query with keyset (cursor) pagination.
+
+        Instead of `SKIP`, the page is selected with `WHERE key > $cursor ORDER BY key LIMIT $limit`,
+        so the cost of a page does not grow with how far the client has paged. The ordering key must
+        be unique (e.g. `elementId(n)` or a property backed by a unique index) and evaluate to a
+        string, number, boolean or temporal value (or a list of those); rows whose key is null are
+        skipped. The query must end with a plain `RETURN` clause without DISTINCT, aggregation or
+        its own ORDER BY/SKIP/LIMIT, which raise ValueError.
+
+        :param cypher_query: The Cypher query string
+        :param cursor_key: The ordering key expression, evaluated in the scope before RETURN (e.g. "n.uuid")
+        :param parameters: A dictionary of query parameters (optional)
+        :param limit: The maximum number of records to fetch per page (default is 100)
+        :param cursor: The continuation token returned with the previous page (None for the first page)
+        :param fetch_size: Overrides the neo4j_fetch_size setting for this call (optional)
+        :param use_writer: Read from the cluster leader instead of a follower/read replica, e.g. to
+            read your own writes (default is False)
+        :return: A tuple of the continuation token for the next page (None when exhausted) and the results
+        """
+        try:
+            cypher_query, parameters = self._prepare_query(cypher_query, parameters)
+            write = _is_write_query(cypher_query)
+            use_writer = use_writer or write
+            _cypher_query, _parameters = _build_cursor_query(
+                cypher_query, cursor_key, parameters, limit, cursor
+            )
+            results, last_key = self._execute_read(
+                _read_cursor_page,
+                _cypher_query,
+                _parameters,
+                self._serialize,
+                fetch_size=fetch_size,
+                use_writer=use_writer,
+                auto_commit=_runs_in_transactions(_cypher_query),
+            )
+            if write:
+                self._invalidate_after_write(cypher_query)
+
+            return _next_cursor(results, last_key, limit), results
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
+
+    def iter_cypher_query(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Executes a Cypher query and yields the converted records as the driver fetches them.
+
+        Records are pulled from the server in batches of `fetch_size`, so memory is bounded by the
+        fetch size rather than the result size. The session stays open only while the generator is
+        being consumed; it is closed once the generator is exhausted, closed or garbage collected.
+
+        :param cypher_query: The Cypher query string
+        :param parameters: A dictionary of query parameters (optional)
+        :param fetch_size: The number of records to fetch per round-trip (defaults to the
+            neo4j_fetch_size setting, or the driver default of 1000)
+        :param use_writer: Read from the cluster leader instead of a follower/read replica, e.g. to
+            read your own writes (default is False)
+        :return: An iterator over the converted records
+        """
+        try:
+            cypher_query, parameters = self._prepare_query(cypher_query, parameters)
+            write = _is_write_query(cypher_query)
+            use_writer = use_writer or write
+            with self.driver.session(
+                **self._session_config(fetch_size, use_writer)
+            ) as session:
+                # Streaming cannot be replayed once records have been yielded, so this
+                # is the one read that stays an auto-commit query without retries.
+                result = session.run(cypher_query, parameters or {})
+                for record in result:
+                    yield _convert_record(record, self._serialize)
+            if write:
+                self._invalidate_after_write(cypher_query)
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
+
+    def bulk_upsert_nodes(
+        self,
+        label: str,
+        rows: Iterable[Dict[str, Any]],
+        key: str,
+        batch_size: int = 1000,
+    ) -> Dict[str, Any]:
+        """
+        Upserts nodes in UNWIND batches, each committed in its own managed write transaction.
+
+        Every row is a property map that must contain `key`; nodes are merged on (label, key) and
+        the remaining properties are set on them. `rows` may be a generator, so the input is never
+        materialized beyond one batch. A uniqueness constraint on (label, key) keeps the MERGE
+        an index lookup.
+
+        :param label: The node label
+        :param rows: The node property maps
+        :param key: The property that identifies a node
+        :param batch_size: The number of rows per UNWIND batch (default is 1000)
+        :return: A report with the total rows, elapsed seconds and rows per second, plus the same
+            figures and the write counters for every batch
+        """
+        return self._bulk_write(
+            _node_upsert_query(label, key), rows, batch_size, tags=(label,)
+        )
+
+    def bulk_upsert_relationships(
+        self,
+        relationship_type: str,
+        rows: Iterable[Dict[str, Any]],
+        source_label: str,
+        source_key: str,
+        target_label: str,
+        target_key: str,
+        batch_size: int = 1000,
+        max_workers: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Upserts relationships in UNWIND batches, each committed in its own managed write transaction.
+
+        Every row has the shape {"source": <source key value>, "target": <target key value>,
+        "properties": {...}}; the endpoints are matched on (source_label, source_key) and
+        (target_label, target_key) and must already exist.
+
+        With `max_workers` above 1 the input is read in windows, the endpoints are hashed into
+        2 * max_workers node partitions and the batches are scheduled in rounds in which no two
+        concurrent batches touch the same node, so the workers never wait on each other's locks
+        or hit deadlock retries.
+
+        :param relationship_type: The relationship type
+        :param rows: The relationship rows
+        :param source_label: The label of the source nodes
+        :param source_key: The property that identifies a source node
+        :param target_label: The label of the target nodes
+        :param target_key: The property that identifies a target node
+        :param batch_size: The number of rows per UNWIND batch (default is 1000)
+        :param max_workers: The number of sessions writing concurrently (default is 1)
+        :return: A report with the total rows, elapsed seconds and rows per second, plus the same
+            figures and the write counters for every batch (and its partition cell when parallel)
+        """
+        cypher_query = _relationship_upsert_query(
+            relationship_type, source_label, source_key, target_label, target_key
+        )
+        tags = (relationship_type, source_label, target_label)
+        if max_workers <= 1:
+            return self._bulk_write(cypher_query, rows, batch_size, tags=tags)
+        return self._bulk_write(
+            cypher_query,
+            rows,
+            batch_size,
+            tags=tags,
+            partition_labels=(source_label, target_label),
+            max_workers=max_workers,
+        )
+
+    def _bulk_write(
+        self,
+        cypher_query: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int,
+        tags: Tuple[str, ...] = (),
+        partition_labels: Optional[Tuple[str, str]] = None,
+        max_workers: int = 1,
+    ) -> Dict[str, Any]:
+        try:
+            started = time.perf_counter()
+            if partition_labels is None:
+                batches = self._write_batches(cypher_query, rows, batch_size)
             else:
-                _cypher_query = f"{cypher_query} SKIP $skip LIMIT $limit"
-                _parameters.update({"skip": skip, "limit": limit})
-
-            with self.driver.session(database=self.database) as session:
-                result = session.run(_cypher_query, _parameters)
-                results = [
-                    {
-                        key: (
+                batches = self._write_partitioned(
+                    cypher_query, rows, batch_size, partition_labels, max_workers
+                )
+            for index, batch in enumerate(batches):
+                batch["batch"] = index
+            return _ingestion_report(batches, time.perf_counter() - started)
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
+        finally:
+            # Cached totals and the pages reading the written labels may no longer match the data.
+            self.invalidate_total_cache()
+            self.invalidate_result_cache(tags)
+
+    def _write_batches(
+        self,
+        cypher_query: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int,
+        partition: Optional[Tuple[int, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        batches = []
+        with self.driver.session(**self._session_config(use_writer=True)) as session:
+            for batch in _chunks(rows, batch_size):
+                batch_started = time.perf_counter()
+                summary = session.execute_write(
+                    _run_write, cypher_query, {"rows": batch}
+                )
+                batches.append(
+                    _batch_report(
+                        len(batches),
+                        len(batch),
+                        time.perf_counter() - batch_started,
+                        summary,
+                    )
+                )
+                if partition is not None:
+                    batches[-1]["partition"] = list(partition)
+        return batches
+
+    def _write_partitioned(
+        self,
+        cypher_query: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int,
+        partition_labels: Tuple[str, str],
+        max_workers: int,
+    ) -> List[Dict[str, Any]]:
+        partitions = max_workers * 2
+        # A window holds roughly one batch per partition cell, so only this many rows are
+        # materialized at a time however large the input is.
+        window_size = batch_size * partitions * partitions
+        batches = []
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="neo4j-ingest"
+        ) as pool:
+            for window in _chunks(rows, window_size):
+                for cells in _partition_rounds(window, *partition_labels, partitions):
+                    futures = [
+                        _submit_in_context(
+                            pool,
+                            self._write_batches,
+                            cypher_query,
+                            cell_rows,
+                            batch_size,
+                            cell,
+                        )
+                        for cell, cell_rows in cells
+                    ]
+                    # The next round may only start once every cell of this one is committed.
+                    for future in futures:
+                        batches.extend(future.result())
+        return batches
+
+
+class AsyncNeo4jConnector(_BaseNeo4jConnector):
+    """
+    asyncio counterpart of Neo4jConnector built on neo4j.AsyncGraphDatabase.
+
+    Every query API is a coroutine (or an async generator) returning exactly the same result
+    shapes as the blocking connector, so a single event loop can keep many queries in flight.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        settings: Optional[Neo4jSettings] = None,
+        instrumentation_hooks: Optional[List[Any]] = None,
+        tracer: Any = None,
+        **setting: Dict[str, Any],
+    ) -> None:
+        super(AsyncNeo4jConnector, self).__init__(
+            logger, settings, instrumentation_hooks, tracer, **setting
+        )
+        self.driver = self._open_driver(AsyncGraphDatabase)
+        # Strong references to background refresh tasks so they are not garbage collected.
+        self._background_tasks = set()
+
+    async def close(self):
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self.driver:
+            if self._release_driver():
+                await self.driver.close()
+            self.driver = None
+
+    @_instrumented("get_graph_schema", _measure_schema)
+    async def get_graph_schema(
+        self,
+        strategy: str = "introspection",
+        sample_size: int = 100,
+        use_cache: bool = True,
+        concurrency: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Generates the schema in the specified format; see Neo4jConnector.get_graph_schema.
+
+        With `concurrency` above 1 the per-label and per-type queries run as that many
+        concurrent sessions on the event loop.
+        """
+        try:
+            if self.schema_cache_ttl <= 0 or not use_cache:
+                return await self._discover_graph_schema(
+                    strategy, sample_size, concurrency
+                )
+
+            cache_key = (strategy, sample_size)
+            schema, stale = self._get_cached_schema(cache_key)
+            if schema is None:
+                schema = await self._discover_graph_schema(
+                    strategy, sample_size, concurrency
+                )
+                self._store_schema(cache_key, schema)
+                return copy.deepcopy(schema)
+
+            if stale:
+                self._refresh_schema_in_background(cache_key, concurrency)
+            return schema
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
+
+    def _refresh_schema_in_background(
+        self, cache_key: Tuple[str, int], concurrency: int
+    ) -> None:
+        if not self._claim_schema_refresh(cache_key):
+            return
+
+        async def refresh():
+            try:
+                schema = await self._discover_graph_schema(*cache_key, concurrency)
+                self._store_schema(cache_key, schema)
+            except Exception:
+                self.logger.error(traceback.format_exc())
+            finally:
+                self._release_schema_refresh(cache_key)
+
+        task = _start_detached(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _profile_in_background(
+        self,
+        entry: Dict[str, Any],
+        cypher_query: str,
+        parameters: Dict[str, Any],
+        use_writer: bool = False,
+    ) -> None:
+        async def profile():
+            try:
+                entry["profile"] = _profile_report(
+                    await self._execute_read(
+                        _async_read_summary,
+                        f"PROFILE {cypher_query}",
+                        parameters,
+                        use_writer=use_writer,
+                    )
+                )
+            except Exception as e:
+                entry["profile"] = {"error": repr(e)}
+                self.logger.error(traceback.format_exc())
+
+        task = _start_detached(profile())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _discover_graph_schema(
+        self, strategy: str, sample_size: int, concurrency: int = 1
+    ) -> Dict[str, Any]:
+        if strategy == "exact":
+            if concurrency > 1:
+                return await self._get_graph_schema_by_label(None, concurrency)
+            return await self._get_graph_schema_by_scan()
+        if strategy == "sampling":
+            return await self._get_graph_schema_by_label(sample_size, concurrency)
+        if strategy != "introspection":
+            raise ValueError(f"Unknown schema strategy: {strategy}")
+
+        try:
+            return await self._get_graph_schema_by_introspection()
+        except Exception:
+            self.logger.warning(
+                "Schema introspection procedures failed, falling back to sampling."
+            )
+            return await self._get_graph_schema_by_label(sample_size, concurrency)
+
+    async def _get_graph_schema_by_introspection(self) -> Dict[str, Any]:
+        return await self._execute_read(_async_introspect_schema)
+
+    async def _get_graph_schema_by_label(
+        self, sample_size: Optional[int], concurrency: int = 1
+    ) -> Dict[str, Any]:
+        labels = await self._execute_read(_async_read_values, _LABELS_QUERY, "label")
+        relationship_types = await self._execute_read(
+            _async_read_values, _RELATIONSHIP_TYPES_QUERY, "relationshipType"
+        )
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def bounded(work, *args):
+            async with semaphore:
+                return await self._execute_read(work, *args)
+
+        label_results = await asyncio.gather(
+            *(bounded(_async_sample_label, label, sample_size) for label in labels)
+        )
+        relationship_results = await asyncio.gather(
+            *(
+                bounded(_async_sample_relationship_type, relationship_type, sample_size)
+                for relationship_type in relationship_types
+            )
+        )
+        return _assemble_schema_by_label(
+            labels,
+            list(label_results),
+            relationship_types,
+            list(relationship_results),
+            sample_size,
+        )
+
+    async def _execute_read(
+        self,
+        work: Any,
+        *args: Any,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+        auto_commit: bool = False,
+    ) -> Any:
+        """
+        Run `work` as a managed read transaction on a fresh read-access session, which the
+        routing driver sends to a follower or read replica; `use_writer` pins it to the leader.
+        With `auto_commit` (for CALL { ... } IN TRANSACTIONS) it runs straight on the session
+        as auto-commit queries, without retries.
+        """
+        work = _async_traced(work, use_writer)
+        async with self.driver.session(
+            **self._session_config(fetch_size, use_writer)
+        ) as session:
+            if auto_commit:
+                return await work(session, *args)
+            if use_writer:
+                return await session.execute_write(work, *args)
+            return await session.execute_read(work, *args)
+
+    async def _get_graph_schema_by_scan(self) -> Dict[str, Any]:
+        return await self._execute_read(_async_scan_schema)
+
+    @_instrumented(
+        "execute_cypher_query_with_pagination", _measure_page, takes_query=True
+    )
+    async def execute_cypher_query_with_pagination(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        skip: int = 0,
+        get_total: Union[bool, str] = False,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+        result_format: str = "records",
+        use_cache: bool = True,
+        cache_tags: Optional[Iterable[str]] = None,
+        write: bool = False,
+    ) -> Tuple[int, Any]:
+        """
+        Executes a Cypher query with pagination; see Neo4jConnector.execute_cypher_query_with_pagination.
+
+        The total count and the page run concurrently on two sessions.
+        """
+        try:
+            _check_result_format(result_format)
+            cypher_query, parameters = self._prepare_query(
+                cypher_query, parameters, write
+            )
+            # Writes run in write transactions on the leader and bypass the result cache.
+            write = write or _is_write_query(cypher_query)
+            use_writer = use_writer or write
+            if write and get_total:
+                # The count wraps the query, so it would apply the write a second time.
+                raise ValueError("get_total is not supported for write queries.")
+            _cypher_query, _parameters = _build_page_query(
+                cypher_query, parameters, skip, limit
+            )
+
+            cache_key, generation = self._result_cache_key(
+                cypher_query,
+                parameters,
+                skip,
+                limit,
+                result_format,
+                use_cache and not write,
+            )
+
+            async def fetch_page():
+                # Reads pinned to the writer want fresh data, so they skip the cached page.
+                results = None if use_writer else self._get_cached_result(cache_key)
+                if results is None:
+                    results = await self._execute_read(
+                        *(
                             (
-                                value.to_native().isoformat()
-                                if isinstance(
-                                    value.to_native(),
-                                    (datetime.date, datetime.datetime),
-                                )
-                                else value.to_native()
+                                _async_read_records,
+                                _cypher_query,
+                                _parameters,
+                                self._serialize,
                             )
-                            if hasattr(value, "to_native")
-                            else value
-                        )
-                        for key, value in record.data().items()
-                    }
-                    for record in result
-                ]
+                            if result_format == "records"
+                            else (
+                                _async_read_columns,
+                                _cypher_query,
+                                _parameters,
+                                result_format,
+                                self._serialize,
+                            )
+                        ),
+                        fetch_size=fetch_size,
+                        use_writer=use_writer,
+                        auto_commit=_runs_in_transactions(_cypher_query),
+                    )
+                    if write:
+                        self._invalidate_after_write(cypher_query)
+                    self._store_result(
+                        cache_key, generation, results, cypher_query, cache_tags
+                    )
+                return results
 
+            if not get_total:
+                return None, await fetch_page()
+
+            total, results = await asyncio.gather(
+                self._fetch_total(
+                    cypher_query, parameters, _total_mode(get_total), use_writer
+                ),
+                fetch_page(),
+            )
             return total, results
         except Exception as e:
             log = traceback.format_exc()
             self.logger.error(log)
             raise e
+
+    async def _fetch_total(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        mode: str = "exact",
+        use_writer: bool = False,
+    ) -> Union[int, Dict[str, Any]]:
+        cache_key = (mode,) + _query_cache_key(cypher_query, parameters)
+        # Reads pinned to the writer want fresh data, so they skip the cached total.
+        total = None if use_writer else self._get_cached_total(cache_key)
+        if total is not None:
+            return _report_total(total, mode)
+
+        if mode == "estimated":
+            total = _estimated_rows(
+                await self._execute_read(
+                    _async_read_summary,
+                    f"EXPLAIN {cypher_query}",
+                    parameters or {},
+                    use_writer=use_writer,
+                )
+            )
+        else:
+            cap = _total_cap(mode)
+            total = await self._execute_read(
+                _async_read_single_value,
+                _build_count_query(cypher_query, cap),
+                "total",
+                parameters if cap is None else {**(parameters or {}), "__cap": cap + 1},
+                use_writer=use_writer,
+            )
+
+        self._store_total(cache_key, total)
+        return _report_total(total, mode)
+
+    async def execute_cypher_query_with_cursor(
+        self,
+        cypher_query: str,
+        cursor_key: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+    ) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        Executes a Cypher query with keyset (cursor) pagination; see
+        Neo4jConnector.execute_cypher_query_with_cursor.
+        """
+        try:
+            cypher_query, parameters = self._prepare_query(cypher_query, parameters)
+            write = _is_write_query(cypher_query)
+            use_writer = use_writer or write
+            _cypher_query, _parameters = _build_cursor_query(
+                cypher_query, cursor_key, parameters, limit, cursor
+            )
+            results, last_key = await self._execute_read(
+                _async_read_cursor_page,
+                _cypher_query,
+                _parameters,
+                self._serialize,
+                fetch_size=fetch_size,
+                use_writer=use_writer,
+                auto_commit=_runs_in_transactions(_cypher_query),
+            )
+            if write:
+                self._invalidate_after_write(cypher_query)
+
+            return _next_cursor(results, last_key, limit), results
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
+
+    async def iter_cypher_query(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None,
+        use_writer: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Executes a Cypher query and yields the converted records as the driver fetches them;
+        see Neo4jConnector.iter_cypher_query.
+        """
+        try:
+            cypher_query, parameters = self._prepare_query(cypher_query, parameters)
+            write = _is_write_query(cypher_query)
+            use_writer = use_writer or write
+            async with self.driver.session(
+                **self._session_config(fetch_size, use_writer)
+            ) as session:
+                result = await session.run(cypher_query, parameters or {})
+                async for record in result:
+                    yield _convert_record(record, self._serialize)
+            if write:
+                self._invalidate_after_write(cypher_query)
+        except Exception as e:
+            log = traceback.format_exc()
+            self.logger.error(log)
+            raise e
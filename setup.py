@@ -16,6 +16,11 @@ setup(
     zip_safe=False,
     platforms="Linux",
     install_requires=["neo4j"],
+    extras_require={
+        "arrow": ["pyarrow"],
+        "numpy": ["numpy"],
+        "pandas": ["pandas"],
+    },
     classifiers=[
         "Programming Language :: Python",
         "Environment :: Web Environment",
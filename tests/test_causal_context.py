@@ -0,0 +1,32 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import logging
+
+from neo4j_graph_connector import Neo4jConnector
+
+
+def _connector():
+    return Neo4jConnector(
+        logging.getLogger(__name__),
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        neo4j_share_driver=False,
+    )
+
+
+def test_causal_context_is_scoped_to_its_connector():
+    first, second = _connector(), _connector()
+    try:
+        with first.causal_context() as bookmark_manager:
+            assert first._session_config()["bookmark_manager"] is bookmark_manager
+            assert (
+                second._session_config()["bookmark_manager"] is second.bookmark_manager
+            )
+            with second.causal_context() as nested:
+                assert second._session_config()["bookmark_manager"] is nested
+                assert first._session_config()["bookmark_manager"] is bookmark_manager
+        assert first._session_config()["bookmark_manager"] is first.bookmark_manager
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import pytest
+from neo4j.time import Date, DateTime, Duration, Time
+
+from neo4j_graph_connector.neo4j_graph_connector import (
+    _build_cursor_query,
+    _decode_cursor,
+    _encode_cursor,
+    _next_cursor,
+)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "a",
+        42,
+        1.5,
+        True,
+        DateTime(2020, 1, 1, 10, 0, 0, 123456789),
+        Date(2020, 1, 2),
+        Time(1, 2, 3),
+        Duration(days=2),
+        [DateTime(2020, 1, 1), "a"],
+    ],
+)
+def test_cursor_round_trips_the_raw_driver_value(value):
+    decoded = _decode_cursor(_encode_cursor(value))
+    assert decoded == value and type(decoded) is type(value)
+
+
+def test_cursor_rejects_keys_that_cannot_round_trip():
+    with pytest.raises(ValueError):
+        _encode_cursor({"a": 1})
+
+
+def test_next_cursor_strips_the_key_and_stops_on_a_short_page():
+    results = [{"n": 1, "__cursor_key": 1}, {"n": 2, "__cursor_key": 2}]
+    assert _decode_cursor(_next_cursor(results, 2, 2)) == 2
+    assert results == [{"n": 1}, {"n": 2}]
+    assert _next_cursor([{"n": 1, "__cursor_key": 1}], 1, 2) is None
+
+
+def test_cursor_query_orders_and_limits_by_the_key():
+    query, parameters = _build_cursor_query(
+        "MATCH (n:Person) RETURN n.name AS name", "n.uuid", {"x": 1}, 10, None
+    )
+    assert query.endswith(
+        "WITH *, n.uuid AS __cursor_key "
+        "WHERE __cursor_key IS NOT NULL "
+        "AND ($__cursor IS NULL OR __cursor_key > $__cursor) "
+        "WITH * ORDER BY __cursor_key LIMIT $__limit "
+        "RETURN n.name AS name, __cursor_key"
+    )
+    assert parameters == {"x": 1, "__cursor": None, "__limit": 10}
+
+
+@pytest.mark.parametrize(
+    "modifiers", ["ORDER BY name", "SKIP 5", "LIMIT 5", "ORDER BY name LIMIT 5"]
+)
+def test_cursor_rejects_return_modifiers(modifiers):
+    with pytest.raises(ValueError):
+        _build_cursor_query(
+            f"MATCH (n) RETURN n.name AS name {modifiers}", "n.uuid", None, 10, None
+        )
+
+
+@pytest.mark.parametrize(
+    "cypher_query",
+    [
+        "MATCH (n) RETURN DISTINCT n.city",
+        "MATCH (n) RETURN n.city AS city, count(*) AS people",
+        "MATCH (n) RETURN size(collect(n)) AS size",
+    ],
+)
+def test_cursor_rejects_aggregating_projections(cypher_query):
+    with pytest.raises(ValueError):
+        _build_cursor_query(cypher_query, "n.uuid", None, 10, None)
+
+
+def test_subquery_expressions_are_not_aggregations():
+    _build_cursor_query(
+        "MATCH (n) RETURN n, COUNT { (n)--() } AS degree", "n.uuid", None, 10, None
+    )
@@ -0,0 +1,130 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import pytest
+
+from neo4j_graph_connector.neo4j_graph_connector import (
+    _normalize_cypher,
+    _query_tags,
+    _tokenize_cypher,
+)
+
+
+def _significant(cypher_query):
+    return [
+        (kind, text)
+        for kind, text in _tokenize_cypher(cypher_query)
+        if kind not in ("space", "comment")
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["42", "0x1F", "0o17", "1_000", "1.5", ".5", "1e3", "1.5e-3", "6.022_140e23"],
+)
+def test_number_tokens_are_whole(text):
+    assert _significant(text) == [("number", text)]
+
+
+def test_range_is_not_a_float():
+    assert _significant("1..3") == [("number", "1"), ("symbol", ".."), ("number", "3")]
+
+
+def test_strings_comments_and_quoted_names_stay_whole():
+    tokens = _tokenize_cypher(
+        "MATCH (n:`My Label`) // a 'comment'\nRETURN 'it\\'s', \"a\\\"b\""
+    )
+    assert ("quoted", "`My Label`") in tokens
+    assert ("comment", "// a 'comment'") in tokens
+    assert ("string", '"a\\"b"') in tokens
+
+
+@pytest.mark.parametrize(
+    "text, value",
+    [("0o17", 15), ("0x1F", 31), ("1_000", 1000), (".5", 0.5), ("1e3", 1000.0)],
+)
+def test_numbers_are_lifted_with_their_value(text, value):
+    assert _normalize_cypher(f"RETURN {text}") == ("RETURN $__lit0", (value,))
+
+
+def test_strings_are_lifted_and_unescaped():
+    assert _normalize_cypher("MATCH (n {name: 'a\\'b\\n'}) RETURN n") == (
+        "MATCH (n {name: $__lit0}) RETURN n",
+        ("a'b\n",),
+    )
+
+
+def test_layout_and_comments_do_not_change_the_template():
+    first = _normalize_cypher("MATCH (n)\n  WHERE n.x = 1 // first\nRETURN n")
+    second = _normalize_cypher("MATCH (n) WHERE n.x = 2 RETURN n")
+    assert first[0] == second[0] == "MATCH (n) WHERE n.x = $__lit0 RETURN n"
+
+
+@pytest.mark.parametrize(
+    "cypher_query",
+    [
+        "CYPHER 5 MATCH (n) RETURN n",
+        "EXPLAIN CYPHER 25 runtime=slotted MATCH (n) RETURN n",
+        "MATCH p = SHORTEST 2 (a)-->+(b) RETURN p",
+        "MATCH p = SHORTEST 2 GROUPS (a)-->+(b) RETURN p",
+        "MATCH p = ANY 3 (a)-->{1,3}(b) RETURN p",
+        "MATCH (a)-[*1..3]->(b) RETURN a",
+        "MATCH (a)-[*2]->(b) RETURN a",
+        "CREATE INDEX idx FOR (n:L) ON (n.p) OPTIONS {indexProvider: 'range-1.0'}",
+        "SHOW INDEXES WHERE name = 'idx'",
+        "CALL { CREATE (n) } IN 4 CONCURRENT TRANSACTIONS",
+        "LOAD CSV WITH HEADERS FROM $url AS row FIELDTERMINATOR ';' RETURN row",
+    ],
+)
+def test_literals_that_cannot_be_parameters_stay_inline(cypher_query):
+    assert _normalize_cypher(cypher_query) == (cypher_query, ())
+
+
+def test_pre_parser_options_end_at_the_first_clause():
+    assert _normalize_cypher("CYPHER 5 MATCH (n) WHERE n.x = 3 RETURN n LIMIT 10") == (
+        "CYPHER 5 MATCH (n) WHERE n.x = $__lit0 RETURN n LIMIT $__lit1",
+        (3, 10),
+    )
+
+
+def test_create_clause_is_not_a_schema_command():
+    assert _normalize_cypher("CREATE (n {name: 'x'})") == (
+        "CREATE (n {name: $__lit0})",
+        ("x",),
+    )
+
+
+def test_tags_are_plain_labels_and_types():
+    assert _query_tags(
+        "MATCH (n:`My Label`)-[:KNOWS]->(m:Person) WHERE m:Admin RETURN m"
+    ) == frozenset(("My Label", "KNOWS", "Person", "Admin"))
+
+
+def test_map_keys_and_type_predicates_are_not_tags():
+    assert _query_tags(
+        "MATCH (n:Person {name: 'x'}) WHERE n.age :: INTEGER RETURN n {name: n.name}"
+    ) == frozenset(("Person",))
+
+
+@pytest.mark.parametrize(
+    "cypher_query",
+    [
+        "MATCH (n:A|B)-[:R1]->(m:C) RETURN n",
+        "MATCH (n:A)-[:R1|R2]->(m:C) RETURN n",
+        "MATCH (n:A&B) RETURN n",
+        "MATCH (n:!A) RETURN n",
+        "MATCH (n:%) RETURN n",
+        "MATCH (n:A) WHERE n IS B RETURN n",
+        "MATCH (n) RETURN n",
+    ],
+)
+def test_label_expressions_and_unlabeled_nodes_get_no_tags(cypher_query):
+    assert _query_tags(cypher_query) == frozenset()
+
+
+def test_only_the_field_terminator_stays_inline_in_load_csv():
+    assert _normalize_cypher(
+        "LOAD CSV FROM 'file:///a.csv' AS row FIELDTERMINATOR '\\t' RETURN row[0] = 'x'"
+    ) == (
+        "LOAD CSV FROM $__lit0 AS row FIELDTERMINATOR '\\t' RETURN row[$__lit1] = $__lit2",
+        ("file:///a.csv", 0, "x"),
+    )
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import pytest
+
+from neo4j_graph_connector.neo4j_graph_connector import (
+    _analyze_query,
+    _build_page_query,
+)
+
+
+def _return_clause(cypher_query):
+    shape = _analyze_query(cypher_query)
+    return cypher_query[shape.return_start : shape.modifiers_start].strip()
+
+
+@pytest.mark.parametrize(
+    "cypher_query, return_clause",
+    [
+        ("MATCH (n) WITH n AS return RETURN return", "RETURN return"),
+        ("MATCH (n) RETURN n.limit AS limit ORDER BY limit", "RETURN n.limit AS limit"),
+        ("MATCH (n) RETURN distinct LIMIT 3", "RETURN distinct"),
+        ("MATCH (n) WITH n LIMIT 5 RETURN n", "RETURN n"),
+        (
+            "MATCH (n) CALL { WITH n RETURN n AS x LIMIT 1 } RETURN x",
+            "RETURN x",
+        ),
+        ("MATCH (n) RETURN n // RETURN m LIMIT 1", "RETURN n"),
+        ("MATCH (n {name: 'RETURN'}) RETURN n", "RETURN n"),
+    ],
+)
+def test_outermost_return_is_found(cypher_query, return_clause):
+    assert _return_clause(cypher_query) == return_clause
+
+
+def test_modifier_spans_and_values():
+    shape = _analyze_query("MATCH (n) RETURN n ORDER BY n.id SKIP 2 LIMIT $limit")
+    assert shape.skip[2] == ("number", "2")
+    assert shape.limit[2] == ("parameter", "$limit")
+    assert not shape.union
+
+
+def test_queries_without_return_have_no_return():
+    shape = _analyze_query("CALL db.labels()")
+    assert shape.return_start is None and shape.end == len("CALL db.labels()")
+
+
+def test_page_is_appended_at_the_outermost_return():
+    assert _build_page_query(
+        "MATCH (n) WITH n AS return RETURN return", None, 5, 10
+    ) == (
+        "MATCH (n) WITH n AS return RETURN return SKIP $__skip LIMIT $__limit",
+        {"__skip": 5, "__limit": 10},
+    )
+
+
+def test_page_stays_inside_an_existing_window():
+    query, parameters = _build_page_query(
+        "MATCH (n) RETURN n ORDER BY n.id SKIP 2 LIMIT 10", None, 5, 10
+    )
+    assert query == "MATCH (n) RETURN n ORDER BY n.id SKIP $__skip LIMIT $__limit"
+    assert parameters == {"__skip": 7, "__limit": 5}
+
+
+def test_union_queries_are_paged_from_outside():
+    query, _ = _build_page_query(
+        "MATCH (n) RETURN n UNION MATCH (m) RETURN m AS n", None, 0, 10
+    )
+    assert query.startswith("CALL (*) { MATCH (n) RETURN n UNION")
+    assert query.endswith("} RETURN * SKIP $__skip LIMIT $__limit")
+
+
+def test_queries_without_return_run_unchanged():
+    assert _build_page_query("CALL db.labels()", {"a": 1}, 0, 10) == (
+        "CALL db.labels()",
+        {"a": 1},
+    )
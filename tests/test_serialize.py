@@ -0,0 +1,54 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from neo4j.graph import Graph, Node, Path
+from neo4j.time import DateTime
+
+from neo4j_graph_connector.neo4j_graph_connector import (
+    _serialize,
+    _serialize_entities,
+)
+
+
+def _path():
+    graph = Graph()
+    start = Node(
+        graph, "n1", 1, ["Person"], {"name": "a", "born": DateTime(2020, 1, 1)}
+    )
+    end = Node(graph, "n2", 2, ["Person"], {"name": "b"})
+    relationship = graph.relationship_type("KNOWS")(graph, "r1", 3, {"since": 2001})
+    relationship._start_node, relationship._end_node = start, end
+    return start, relationship, Path(start, relationship)
+
+
+def test_entities_keep_the_record_data_shape_by_default():
+    node, relationship, path = _path()
+    start = {"name": "a", "born": "2020-01-01T00:00:00"}
+    assert _serialize(node) == start
+    assert _serialize(relationship) == (start, "KNOWS", {"name": "b"})
+    assert _serialize(path) == [start, "KNOWS", {"name": "b"}]
+
+
+def test_entity_dicts_are_opt_in():
+    node, relationship, path = _path()
+    assert _serialize_entities(node) == {
+        "element_id": "n1",
+        "labels": ["Person"],
+        "properties": {"name": "a", "born": "2020-01-01T00:00:00"},
+    }
+    assert _serialize_entities(relationship) == {
+        "element_id": "r1",
+        "type": "KNOWS",
+        "start": "n1",
+        "end": "n2",
+        "properties": {"since": 2001},
+    }
+    assert [node["element_id"] for node in _serialize_entities(path)["nodes"]] == [
+        "n1",
+        "n2",
+    ]
+
+
+def test_nested_values_are_converted():
+    assert _serialize({"a": [DateTime(2020, 1, 1), (1, 2)]}) == {
+        "a": ["2020-01-01T00:00:00", [1, 2]]
+    }
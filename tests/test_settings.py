@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import pytest
+
+from neo4j_graph_connector import Neo4jSettings
+
+REQUIRED = {
+    "neo4j_uri": "bolt://localhost",
+    "neo4j_username": "u",
+    "neo4j_password": "p",
+}
+
+
+def _settings(**setting):
+    return Neo4jSettings.from_setting(dict(REQUIRED, **setting))
+
+
+@pytest.mark.parametrize("value, expected", [(8, 8), (8.0, 8), ("8", 8), (" 8 ", 8)])
+def test_int_settings_accept_integral_values(value, expected):
+    assert _settings(neo4j_max_workers=value).max_workers == expected
+
+
+@pytest.mark.parametrize("value", [3.7, "3.7", "three", True])
+def test_int_settings_reject_non_integral_values(value):
+    with pytest.raises(ValueError):
+        _settings(neo4j_max_workers=value)
+
+
+def test_float_and_bool_settings_are_converted():
+    settings = _settings(neo4j_total_cache_ttl="1.5", neo4j_share_driver="false")
+    assert settings.total_cache_ttl == 1.5 and settings.share_driver is False
+
+
+@pytest.mark.parametrize(
+    "setting",
+    [
+        {"neo4j_causal_consistency": "eventual"},
+        {"neo4j_entity_format": "graph"},
+        {"neo4j_fetch_size": 0},
+        {"neo4j_max_workers": 0},
+        {"neo4j_total_cache_ttl": -1},
+    ],
+)
+def test_invalid_settings_are_rejected(setting):
+    with pytest.raises(ValueError):
+        _settings(**setting)
+
+
+def test_missing_required_settings_are_reported():
+    with pytest.raises(ValueError, match="neo4j_password"):
+        Neo4jSettings.from_setting({"neo4j_uri": "x", "neo4j_username": "u"})
@@ -0,0 +1,27 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import pytest
+
+from neo4j_graph_connector.neo4j_graph_connector import _report_total, _total_mode
+
+
+@pytest.mark.parametrize(
+    "get_total, mode",
+    [(True, "exact"), ("estimated", "estimated"), ("capped:100", "capped:100")],
+)
+def test_total_modes(get_total, mode):
+    assert _total_mode(get_total) == mode
+
+
+@pytest.mark.parametrize(
+    "get_total", ["exact", "estimate", "true", "capped:", "capped:0", "capped:x"]
+)
+def test_unknown_total_modes_are_rejected(get_total):
+    with pytest.raises(ValueError):
+        _total_mode(get_total)
+
+
+def test_capped_totals_report_whether_the_cap_was_passed():
+    assert _report_total(42, "exact") == 42
+    assert _report_total(100, "capped:100") == {"total": 100, "capped": False}
+    assert _report_total(101, "capped:100") == {"total": 100, "capped": True}
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import logging
+
+import pytest
+from neo4j import WRITE_ACCESS, Record
+
+from neo4j_graph_connector import Neo4jConnector
+from neo4j_graph_connector.neo4j_graph_connector import (
+    _is_write_query,
+    _runs_in_transactions,
+)
+
+
+class _Session(object):
+    def __init__(self, calls, **config):
+        self.calls = calls
+        self.config = config
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def run(self, cypher_query, parameters=None):
+        self.calls.append(("run", self.config.get("default_access_mode"), cypher_query))
+        return [Record([("n", 1)])]
+
+    def execute_read(self, work, *args):
+        self.calls.append(("execute_read", self.config.get("default_access_mode")))
+        return work(self, *args)
+
+    def execute_write(self, work, *args):
+        self.calls.append(("execute_write", self.config.get("default_access_mode")))
+        return work(self, *args)
+
+
+class _Driver(object):
+    def __init__(self):
+        self.calls = []
+
+    def session(self, **config):
+        return _Session(self.calls, **config)
+
+    def close(self):
+        pass
+
+
+def _connector(**setting):
+    connector = Neo4jConnector(
+        logging.getLogger(__name__),
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        neo4j_share_driver=False,
+        **setting,
+    )
+    connector.driver = _Driver()
+    return connector
+
+
+@pytest.fixture
+def connector():
+    connector = _connector()
+    yield connector
+    connector.close()
+
+
+@pytest.mark.parametrize(
+    "cypher_query",
+    [
+        "UNWIND $rows AS row CALL (row) { CREATE (:A {id: row}) } IN TRANSACTIONS",
+        "UNWIND $rows AS row CALL { WITH row MERGE (:A {id: row}) } "
+        "IN TRANSACTIONS OF 500 ROWS RETURN count(*) AS n",
+        "CALL { MATCH (n) DETACH DELETE n } IN 4 CONCURRENT TRANSACTIONS",
+    ],
+)
+def test_call_in_transactions_is_detected(cypher_query):
+    assert _runs_in_transactions(cypher_query)
+
+
+@pytest.mark.parametrize(
+    "cypher_query",
+    [
+        "MATCH (n) WHERE n.kind IN transactions RETURN n",
+        "CALL { MATCH (n) RETURN n } RETURN n",
+        "MATCH (n) CALL { WITH n MATCH (n)--(m) RETURN m "
+        "// IN TRANSACTIONS\n} RETURN m",
+    ],
+)
+def test_other_queries_are_not_batched(cypher_query):
+    assert not _runs_in_transactions(cypher_query)
+
+
+def test_writes_run_in_managed_write_transactions(connector):
+    assert _is_write_query("CREATE (n:A) RETURN n")
+    connector.execute_cypher_query_with_pagination("CREATE (n:A) RETURN n")
+    assert connector.driver.calls[0] == ("execute_write", WRITE_ACCESS)
+
+
+def test_call_in_transactions_runs_as_auto_commit_write(connector):
+    connector.execute_cypher_query_with_pagination(
+        "UNWIND $rows AS row CALL (row) { CREATE (n:A {id: row}) } IN TRANSACTIONS "
+        "RETURN count(*) AS n",
+        {"rows": [1, 2]},
+    )
+    assert [call[:2] for call in connector.driver.calls] == [("run", WRITE_ACCESS)]
+
+
+def test_writes_cannot_be_counted(connector):
+    with pytest.raises(ValueError):
+        connector.execute_cypher_query_with_pagination(
+            "CREATE (n:A) RETURN n", get_total=True
+        )
+    assert connector.driver.calls == []
+
+
+def test_only_reads_are_normalized():
+    connector = _connector(neo4j_normalize_queries=True)
+    connector.execute_cypher_query_with_pagination("MATCH (n {id: 1}) RETURN n")
+    connector.execute_cypher_query_with_pagination("CREATE (n:A {id: 1}) RETURN n")
+    queries = [call[2] for call in connector.driver.calls if call[0] == "run"]
+    assert queries[0].startswith("MATCH (n {id: $__lit0}) RETURN n")
+    assert queries[1].startswith("CREATE (n:A {id: 1}) RETURN n")
+    assert connector.get_query_template_stats()["calls"] == 1
+    connector.close()